@@ -0,0 +1,40 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+# The application modules live in src/ and import each other by bare name
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+@contextmanager
+def temp_database(profile=None):
+    """Yield a Database backed by a fresh file in a temporary directory."""
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'notes.db'), profile)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+@contextmanager
+def temp_session(profile=None):
+    """Yield a session bound to a fresh database in a temporary directory."""
+    with temp_database(profile) as db:
+        yield db.get_session()
+
+
+@contextmanager
+def timer(results, key):
+    """Store the elapsed wall time of the block in ``results[key]`` (seconds)."""
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
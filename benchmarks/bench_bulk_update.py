@@ -0,0 +1,46 @@
+"""Compare per-note update_note calls with the bulk update_geometries API.
+
+Usage: python benchmarks/bench_bulk_update.py [--notes 2000]
+"""
+import argparse
+
+import _common
+from note_operations import NoteOperations
+
+
+def seed(note_ops, count):
+    ids = []
+    for i in range(count):
+        note = note_ops.create_note("", f"Note {i}", position_x=0, position_y=0)
+        ids.append(note.id)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    with _common.temp_session() as session:
+        note_ops = NoteOperations(session)
+        ids = seed(note_ops, args.notes)
+
+        with _common.timer(results, 'update_note'):
+            for i, note_id in enumerate(ids):
+                note_ops.update_note(note_id, position_x=i * 10, position_y=i * 10,
+                                     width=300, height=200)
+
+        geometries = {note_id: (i * 20, i * 20, 320, 220) for i, note_id in enumerate(ids)}
+        with _common.timer(results, 'update_geometries'):
+            note_ops.update_geometries(geometries)
+
+    print(f"{args.notes} notes")
+    for name, elapsed in results.items():
+        per_note = elapsed / args.notes * 1e6
+        print(f"  {name:<18} {elapsed * 1000:9.1f} ms total  {per_note:8.1f} us/note")
+    print(f"  speedup            {results['update_note'] / results['update_geometries']:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
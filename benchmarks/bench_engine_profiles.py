@@ -0,0 +1,64 @@
+"""Compare write and read throughput of the SQLite engine profiles in database.py.
+
+Writes mimic autosave flushes (a few notes per transaction); reads load the
+board and run searches.
+
+Usage: python benchmarks/bench_engine_profiles.py [--notes 2000] [--flushes 500]
+"""
+import argparse
+import random
+
+import _common
+from database import ENGINE_PROFILES
+from note_operations import NoteOperations
+
+WORDS = "alpha beta gamma delta notes board meeting todo idea draft review".split()
+
+
+def run(profile, notes, flushes, rng):
+    results = {}
+    with _common.temp_session(profile) as session:
+        note_ops = NoteOperations(session)
+        with _common.timer(results, 'create'):
+            ids = [note_ops.create_note("", " ".join(rng.choices(WORDS, k=40)),
+                                        position_x=rng.randint(-4000, 4000),
+                                        position_y=rng.randint(-4000, 4000)).id
+                   for _ in range(notes)]
+
+        with _common.timer(results, 'autosave_flush'):
+            for i in range(flushes):
+                batch = {note_id: {'content': f"edit {i} " + " ".join(rng.choices(WORDS, k=40))}
+                         for note_id in rng.sample(ids, 3)}
+                note_ops.apply_updates(batch)
+
+        with _common.timer(results, 'get_all_notes'):
+            for _ in range(5):
+                session.expire_all()
+                note_ops.get_all_notes()
+
+        with _common.timer(results, 'search'):
+            for word in WORDS:
+                note_ops.search_note_ids(word)
+
+    results['creates_per_s'] = notes / results['create']
+    results['flushes_per_s'] = flushes / results['autosave_flush']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--flushes', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.notes} notes, {args.flushes} autosave flushes")
+    print(f"  {'profile':<10} {'creates/s':>10} {'flushes/s':>10} {'load x5':>10} {'search':>10}")
+    for profile in ENGINE_PROFILES:
+        results = run(profile, args.notes, args.flushes, random.Random(args.seed))
+        print(f"  {profile:<10} {results['creates_per_s']:10.0f} {results['flushes_per_s']:10.0f} "
+              f"{results['get_all_notes'] * 1000:8.1f}ms {results['search'] * 1000:8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Compare NoteWidget creation and restyling with per-note stylesheets vs the shared theme.
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_note_creation.py [--notes 300]
+"""
+import argparse
+import os
+
+import _common
+from PyQt6.QtWidgets import QApplication, QWidget
+
+import theme
+from note_widget import NoteWidget
+
+# The per-note stylesheet NoteWidget compiled before the theme module existed
+LEGACY_STYLESHEET = """
+    QWidget {{
+        background-color: {color};
+        border-radius: 5px;
+        border: 1px solid #333333;
+    }}
+    QTextEdit {{
+        border: none;
+        background: transparent;
+        color: #ffffff;
+        font-size: {text_size}px;
+        selection-background-color: #264f78;
+    }}
+    QTextEdit::placeholder {{
+        color: #888888;
+    }}
+    QPushButton {{
+        border: none;
+        background: transparent;
+        color: #ffffff;
+        font-size: 18px;
+        padding: 5px;
+    }}
+    QPushButton:hover {{
+        background-color: rgba(255, 255, 255, 0.1);
+        border-radius: 15px;
+    }}
+    QLabel {{
+        color: #888888;
+        font-size: 12px;
+    }}
+    QMenu {{
+        background-color: #2d2d2d;
+        border: 1px solid #333333;
+        color: #ffffff;
+    }}
+    QMenu::item {{
+        padding: 5px 20px;
+    }}
+    QMenu::item:selected {{
+        background-color: #264f78;
+    }}
+"""
+
+
+class LegacyNoteWidget(NoteWidget):
+    def set_color(self, color):
+        self.color = color
+        self.content_container.setStyleSheet(LEGACY_STYLESHEET.format(color=color, text_size=self.text_size))
+        self.note_modified()
+
+    def update_text_size(self, size):
+        self.text_size = size
+        if self.content_edit:
+            self.content_edit.setStyleSheet(f"font-size: {size}px;")
+            self.note_modified()
+
+
+def run(widget_class, count):
+    results = {}
+    colors = list(theme.NOTE_COLORS.values())
+    widgets = []
+    with _common.timer(results, 'create'):
+        for i in range(count):
+            widget = widget_class(note_id=i, content=f"Note {i}", color=colors[i % len(colors)])
+            widget.ensurePolished()
+            for child in widget.findChildren(QWidget):
+                child.ensurePolished()
+            widgets.append(widget)
+    with _common.timer(results, 'recolor'):
+        for i, widget in enumerate(widgets):
+            widget.set_color(colors[(i + 1) % len(colors)])
+            widget.content_container.ensurePolished()
+    with _common.timer(results, 'resize_text'):
+        for widget in widgets:
+            widget.update_text_size(widget.text_size + 2)
+            widget.content_edit.ensurePolished()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=300)
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication([])
+
+    print(f"{args.notes} notes")
+    for label, widget_class in (('per-note stylesheet', LegacyNoteWidget), ('shared theme', NoteWidget)):
+        if widget_class is NoteWidget:
+            theme.install(app)
+        results = run(widget_class, args.notes)
+        print(f"  {label}")
+        for name, elapsed in results.items():
+            print(f"    {name:<12} {elapsed * 1000:9.1f} ms total  {elapsed / args.notes * 1e6:8.1f} us/note")
+
+
+if __name__ == '__main__':
+    main()
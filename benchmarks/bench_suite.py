@@ -0,0 +1,190 @@
+"""Benchmark NoteOperations and the board at several board sizes, writing JSON.
+
+Every size gets a fresh temporary database filled by generate_board with a
+fixed seed, so runs are comparable. The GUI benchmarks drive a real
+MainWindow on the offscreen Qt platform.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--seed 1]
+                                        [--output results.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+
+import _common
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QEventLoop, QTimer, PYQT_VERSION_STR
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+import theme
+from generate_board import VOCABULARY, generate_board
+from note_operations import NoteOperations
+
+WRITE_OPS = 500  # create_note / update_note calls per size
+SEARCH_QUERIES = ["alpha", "meeting todo", "rev", '"draft review"', "nomatch"]
+KEYSTROKES = "The quick brown fox jumps over the lazy dog. " * 4
+
+
+def bench_operations(db, size, results):
+    session = db.create_session()
+    note_ops = NoteOperations(session)
+    try:
+        with _common.timer(results, 'ops.get_note_metadata'):
+            note_ops.get_note_metadata()
+        with _common.timer(results, 'ops.get_all_notes'):
+            notes = note_ops.get_all_notes()
+        ids = [note.id for note in notes[:WRITE_OPS]]
+        # Like MainWindow, don't keep the board's rows alive in the session:
+        # every commit would expire all of them
+        del notes
+
+        with _common.timer(results, 'ops.create_note'):
+            for i in range(WRITE_OPS):
+                note_ops.create_note("", f"Benchmark note {i}", position_x=-1000, position_y=-1000)
+        results['ops.create_note_per_s'] = WRITE_OPS / results['ops.create_note']
+
+        with _common.timer(results, 'ops.update_note'):
+            for i, note_id in enumerate(ids):
+                note_ops.update_note(note_id, content=f"Edited {i} " + VOCABULARY[i % len(VOCABULARY)])
+        results['ops.update_note_per_s'] = len(ids) / results['ops.update_note']
+
+        latencies = []
+        for query in SEARCH_QUERIES:
+            start = time.perf_counter()
+            note_ops.search_notes(query)
+            latencies.append(time.perf_counter() - start)
+        results['ops.search_notes_median'] = statistics.median(latencies)
+        results['ops.search_notes_max'] = max(latencies)
+    finally:
+        session.close()
+
+
+def wait_for(signal, timeout_ms=600000):
+    """Run the event loop until ``signal`` fires."""
+    loop = QEventLoop()
+    signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    signal.disconnect(loop.quit)
+
+
+def bench_board(results):
+    from main import MainWindow
+
+    window = MainWindow()
+    window.resize(1400, 900)
+    window.show()
+    QApplication.processEvents()
+    try:
+        window._started = True  # Drive the staged startup by hand
+        window.open_database()
+        window.toolbar_container.setEnabled(True)
+
+        with _common.timer(results, 'gui.load_notes'):
+            window.load_notes()
+            wait_for(window.notes_loaded)
+            QApplication.processEvents()
+
+        search_times = []
+        for query in SEARCH_QUERIES + [""]:
+            window.search_bar.blockSignals(True)  # Skip the debounce timer
+            window.search_bar.setText(query)
+            window.search_bar.blockSignals(False)
+            start = time.perf_counter()
+            window.perform_search()
+            QApplication.processEvents()
+            search_times.append(time.perf_counter() - start)
+        results['gui.perform_search_median'] = statistics.median(search_times)
+        results['gui.perform_search_max'] = max(search_times)
+
+        with _common.timer(results, 'gui.arrange_notes'):
+            window.arrange_notes()
+            QApplication.processEvents()
+
+        # Type into a note on screen, through the updated signal and autosave
+        note_widget = next(proxy.widget() for proxy in window.note_proxies.values()
+                           if proxy.widget() is not None)
+        note_widget.highlight_search("fox")
+        note_widget.content_edit.setFocus()
+        with _common.timer(results, 'gui.keystroke_burst'):
+            QTest.keyClicks(note_widget.content_edit, KEYSTROKES)
+        results['gui.keystroke_ms'] = results['gui.keystroke_burst'] / len(KEYSTROKES) * 1000
+    finally:
+        window.close()
+        QApplication.processEvents()
+
+
+def run_size(size, seed, gui):
+    results = {}
+    with _common.temp_database() as db:
+        with _common.timer(results, 'seed'):
+            generate_board(db.engine, size, seed=seed)
+        bench_operations(db, size, results)
+        if gui:
+            os.environ['NOTES_DB_PATH'] = db.path
+            bench_board(results)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'pyqt': PYQT_VERSION_STR,
+        'qpa': os.environ.get('QT_QPA_PLATFORM'),
+    }
+
+
+def print_results(report, previous=None):
+    for size, results in report['results'].items():
+        print(f"{size} notes")
+        before = (previous or {}).get('results', {}).get(size, {})
+        for name, value in results.items():
+            unit = "" if name.endswith(('_per_s', '_ms')) else " s"
+            line = f"  {name:<28} {value:12.4f}{unit}"
+            if name in before and before[name]:
+                line += f"   ({value / before[name]:.2f}x previous)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default="1000,10000,100000",
+                        help="comma-separated note counts")
+    parser.add_argument('--seed', type=int, default=1, help="seed for the generated boards")
+    parser.add_argument('--output', default="benchmark_results.json")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--no-gui', action='store_true', help="only benchmark NoteOperations")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    app.setStyle('Fusion')
+    theme.install(app)
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(),
+              'seed': args.seed, 'results': {}}
+    for size in (int(size) for size in args.sizes.split(',')):
+        report['results'][str(size)] = run_size(size, args.seed, not args.no_gui)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_results(report, previous)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from sqlalchemy.orm import Session
+
+from note_operations import NoteOperations
+from change_tracker import ChangeTracker
+
+logger = logging.getLogger(__name__)
+
+
+class AutosaveQueue(QObject):
+    """Write-behind queue that merges note edits and persists them off the GUI thread.
+
+    Edits are merged per note for ``window_ms`` after the first one arrives and
+    are then written by a background worker in a single transaction.
+    """
+    flushed = pyqtSignal(list)  # Emitted with the ids of the notes written by a flush
+
+    def __init__(self, session_factory: Callable[[], Session], window_ms: int = 500,
+                 tracker: Optional[ChangeTracker] = None, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self.tracker = tracker
+        self.window = window_ms / 1000.0
+        self._pending: Dict[int, dict] = {}
+        self._in_flight: Dict[int, dict] = {}  # Taken by a flush that hasn't committed yet
+        self._deadline: Optional[float] = None
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()  # Serialises worker and explicit flushes
+        self._worker = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, note_id: int, **fields):
+        """Queue changed fields for a note, merging them with any pending edit."""
+        with self._condition:
+            # Nothing pending and nothing new: don't even wake the worker. With an
+            # edit pending or being written the result is checked at flush time.
+            busy = note_id in self._pending or note_id in self._in_flight
+            if self.tracker is not None and not busy:
+                fields = self.tracker.changed_fields(note_id, fields)
+                if not fields:
+                    return
+            self._pending.setdefault(note_id, {}).update(fields)
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.window
+                self._condition.notify()
+
+    def discard(self, note_id: int):
+        """Drop pending edits for a note, e.g. because it was deleted."""
+        with self._condition:
+            self._pending.pop(note_id, None)
+
+    def pending(self, note_id: int) -> dict:
+        """Return a copy of the fields still waiting to be written for a note."""
+        with self._condition:
+            fields = dict(self._in_flight.get(note_id, {}))
+            fields.update(self._pending.get(note_id, {}))
+            return fields
+
+    def has_pending(self, fields=None) -> bool:
+        """Return True if edits are queued or being written, optionally only edits to ``fields``."""
+        with self._condition:
+            edits = list(self._pending.values()) + list(self._in_flight.values())
+        return any(fields is None or not fields.isdisjoint(edit) for edit in edits)
+
+    def flush(self) -> bool:
+        """Write all pending edits now, blocking until they are committed.
+
+        Returns False if the write failed; the edits are then queued again.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                self._deadline = None
+                self._in_flight = batch
+            if not batch:
+                return True
+
+            session = self.session_factory()
+            try:
+                NoteOperations(session, self.tracker).apply_updates(batch)
+            except Exception:
+                logger.exception("Autosave of %d notes failed, retrying later", len(batch))
+                session.rollback()
+                self._requeue(batch)
+                return False
+            finally:
+                session.close()
+                with self._condition:
+                    self._in_flight = {}
+        self.flushed.emit(list(batch))
+        return True
+
+    def close(self, attempts: int = 3) -> bool:
+        """Flush outstanding edits and stop the worker thread.
+
+        Returns False, leaving the worker running with the edits still queued,
+        if none of ``attempts`` flushes succeeded.
+        """
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self.window)
+            if self.flush():
+                self.stop()
+                return True
+        return False
+
+    def stop(self):
+        """Stop the worker thread, dropping any edits that are still queued."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._worker.join()
+
+    def _requeue(self, batch: Dict[int, dict]):
+        with self._condition:
+            for note_id, fields in batch.items():
+                # Newer edits queued while the flush ran take precedence
+                merged = dict(fields)
+                merged.update(self._pending.get(note_id, {}))
+                self._pending[note_id] = merged
+            if self._deadline is None and not self._stopped:
+                self._deadline = time.monotonic() + self.window
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and self._deadline is None:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self.flush()
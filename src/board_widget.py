@@ -1,12 +1,18 @@
-from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QWidget, QGraphicsProxyWidget, QPushButton, QLineEdit, QTextEdit
-from PyQt6.QtCore import Qt, QPointF, QRectF, QPoint
-from PyQt6.QtGui import QPainter, QColor, QBrush, QPen
+from PyQt6.QtWidgets import (QGraphicsView, QGraphicsScene, QWidget, QGraphicsProxyWidget, QPushButton, QLineEdit, QTextEdit,
+                           QGraphicsRectItem, QLabel)
+from PyQt6.QtCore import Qt, QPointF, QRectF, QPoint, QLineF, QTimer, QVariantAnimation, QEasingCurve
+from PyQt6.QtGui import QPainter, QColor, QBrush, QPen, QFont, QImage, QTransform
+import heapq
 import logging
+import math
 from PyQt6.QtCore import pyqtSignal
+import instrumentation
 
 logger = logging.getLogger(__name__)
 
 class DraggableProxyWidget(QGraphicsProxyWidget):
+    geometry_committed = pyqtSignal(QRectF, QRectF)  # (before, after) once a drag or resize ends
+    
     def __init__(self):
         super().__init__()
         self.setAcceptHoverEvents(True)
@@ -15,15 +21,43 @@ class DraggableProxyWidget(QGraphicsProxyWidget):
         self.setFlag(self.GraphicsItemFlag.ItemSendsGeometryChanges)
         self.dragging = False
         self.resizing = False
-        self.last_pos = None
+        self.press_pos = None
         self.drag_offset = None
         self.resize_edge = None
+        self.resize_rect = None  # Geometry the current resize will apply on release
+        self.press_geometry = None  # Geometry when the current drag or resize started
         self.min_size = (300, 200)  # Minimum size (width, height)
         self.max_size = (800, 1000)  # Maximum size (width, height)
         self.resize_margin = 10  # Pixels from edge where resize is active
+        self._regions = None  # Hit-test rects in item coordinates, see hit_regions()
+        self._hover_cursor = None
+        self._outline = None
+    
+    def hit_regions(self):
+        """Return (rect, header, header children) in item coordinates.
+        
+        The embedded widget's coordinates are the item's, so the rects only
+        change when the note is resized; they are cached until then.
+        """
+        if self._regions is None:
+            header_rect, child_rects = QRectF(), []
+            widget = self.widget()
+            header = widget.header_container if widget else None
+            if header:
+                offset = QPointF(header.mapTo(widget, QPoint(0, 0)))
+                header_rect = QRectF(header.rect()).translated(offset)
+                child_rects = [QRectF(child.geometry()).translated(offset)
+                               for child in header.findChildren(QWidget, options=Qt.FindChildOption.FindDirectChildrenOnly)
+                               if child.isVisible()]
+            self._regions = (self.rect(), header_rect, child_rects)
+        return self._regions
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._regions = None
     
     def isInResizeArea(self, pos):
-        rect = self.rect()
+        rect = self.hit_regions()[0]
         x, y = pos.x(), pos.y()
         margin = self.resize_margin
         
@@ -56,28 +90,21 @@ class DraggableProxyWidget(QGraphicsProxyWidget):
         return None
     
     def isInHeader(self, pos):
-        widget = self.widget()
-        if not widget:
-            return False
-        
-        # Get the header widget
-        header = widget.header_container
-        if not header:
+        # In the header and not over one of its buttons
+        _, header, children = self.hit_regions()
+        if not header.contains(pos):
             return False
-        
-        # Convert to global coordinates
-        scene_pos = self.mapToScene(pos)
-        view = self.scene().views()[0]
-        global_pos = view.mapToGlobal(view.mapFromScene(scene_pos))
-        
-        # Convert to header coordinates
-        header_pos = header.mapFromGlobal(global_pos)
-        
-        # Check if we're in the header and not over a child widget
-        if header.rect().contains(header_pos):
-            child = header.childAt(header_pos)
-            return child is None
-        return False
+        return not any(child.contains(pos) for child in children)
+    
+    def set_hover_cursor(self, shape):
+        # Cursor changes go through the view, so skip the ones that change nothing
+        if shape == self._hover_cursor:
+            return
+        self._hover_cursor = shape
+        if shape is None:
+            self.unsetCursor()
+        else:
+            self.setCursor(shape)
     
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -85,13 +112,19 @@ class DraggableProxyWidget(QGraphicsProxyWidget):
             if resize_area:
                 self.resizing = True
                 self.resize_edge = resize_area
-                self.last_pos = event.pos()
+                self.press_pos = event.pos()
+                self.press_geometry = self.geometry()
+                # The note only changes on release, so it is drawn from a cached pixmap meanwhile
+                self.setCacheMode(self.CacheMode.DeviceCoordinateCache)
                 event.accept()
                 return
             elif self.isInHeader(event.pos()):
                 self.dragging = True
-                self.setCursor(Qt.CursorShape.ClosedHandCursor)
+                self.set_hover_cursor(Qt.CursorShape.ClosedHandCursor)
                 self.drag_offset = event.pos()
+                self.press_geometry = self.geometry()
+                # Moving only blits the cached note instead of repainting the widget
+                self.setCacheMode(self.CacheMode.DeviceCoordinateCache)
                 event.accept()
                 return
         super().mousePressEvent(event)
@@ -101,84 +134,399 @@ class DraggableProxyWidget(QGraphicsProxyWidget):
             if self.resizing:
                 self.resizing = False
                 self.resize_edge = None
-                self.unsetCursor()
+                self.set_hover_cursor(None)
+                if self._outline is not None:
+                    self._outline.hide()
+                self.setCacheMode(self.CacheMode.NoCache)
+                # The widget is laid out once, at its final size
+                if self.resize_rect is not None:
+                    self.setGeometry(self.resize_rect)
+                    self.resize_rect = None
+                self.commit_geometry()
                 event.accept()
             elif self.dragging:
                 self.dragging = False
                 self.drag_offset = None
-                self.unsetCursor()
+                self.set_hover_cursor(None)
+                self.setCacheMode(self.CacheMode.NoCache)
+                self.commit_geometry()
                 event.accept()
             else:
                 super().mouseReleaseEvent(event)
         else:
             super().mouseReleaseEvent(event)
     
+    def commit_geometry(self):
+        before, self.press_geometry = self.press_geometry, None
+        if before is not None and before != self.geometry():
+            self.geometry_committed.emit(before, self.geometry())
+    
+    def resized_rect(self, pos):
+        """Return the geometry a resize would give with the mouse at ``pos``."""
+        start = self.press_geometry
+        delta = pos - self.press_pos  # The item doesn't move until release
+        left, top, right, bottom = start.left(), start.top(), start.right(), start.bottom()
+        min_width, min_height = self.min_size
+        max_width, max_height = self.max_size
+        
+        # Handle horizontal resizing
+        if 'left' in self.resize_edge:
+            left = right - min(max_width, max(min_width, start.width() - delta.x()))
+        elif 'right' in self.resize_edge:
+            right = left + min(max_width, max(min_width, start.width() + delta.x()))
+        
+        # Handle vertical resizing
+        if 'top' in self.resize_edge:
+            top = bottom - min(max_height, max(min_height, start.height() - delta.y()))
+        elif 'bottom' in self.resize_edge:
+            bottom = top + min(max_height, max(min_height, start.height() + delta.y()))
+        
+        return QRectF(QPointF(left, top), QPointF(right, bottom))
+    
+    def show_outline(self, rect):
+        # Drawn in item coordinates, so offset by the note's position
+        if self._outline is None:
+            self._outline = QGraphicsRectItem(self)
+            self._outline.setPen(QPen(QColor("#0078d4"), 0, Qt.PenStyle.DashLine))
+        self._outline.setRect(rect.translated(-self.pos()))
+        self._outline.show()
+    
     def mouseMoveEvent(self, event):
-        if self.resizing and self.last_pos is not None:
-            delta = event.pos() - self.last_pos
-            current_rect = self.geometry()
-            new_rect = QRectF(current_rect)
-            
-            # Store original values
-            original_left = current_rect.left()
-            original_top = current_rect.top()
-            original_width = current_rect.width()
-            original_height = current_rect.height()
-            
-            # Handle horizontal resizing
-            if 'left' in self.resize_edge:
-                new_width = original_width - delta.x()
-                if self.min_size[0] <= new_width <= self.max_size[0]:
-                    new_rect.setLeft(original_left + delta.x())
-                    new_rect.setWidth(new_width)
-            elif 'right' in self.resize_edge:
-                new_width = original_width + delta.x()
-                if self.min_size[0] <= new_width <= self.max_size[0]:
-                    new_rect.setWidth(new_width)
-            
-            # Handle vertical resizing
-            if 'top' in self.resize_edge:
-                new_height = original_height - delta.y()
-                if self.min_size[1] <= new_height <= self.max_size[1]:
-                    new_rect.setTop(original_top + delta.y())
-                    new_rect.setHeight(new_height)
-            elif 'bottom' in self.resize_edge:
-                new_height = original_height + delta.y()
-                if self.min_size[1] <= new_height <= self.max_size[1]:
-                    new_rect.setHeight(new_height)
-            
-            self.setGeometry(new_rect)
-            self.last_pos = event.pos()
+        if self.resizing and self.press_pos is not None:
+            with instrumentation.timed('note.resize'):
+                self.resize_rect = self.resized_rect(event.pos())
+                self.show_outline(self.resize_rect)
             event.accept()
         elif self.dragging and self.drag_offset is not None:
-            new_pos = self.mapToScene(event.pos() - self.drag_offset)
-            self.setPos(new_pos)
+            with instrumentation.timed('note.drag'):
+                new_pos = self.mapToScene(event.pos() - self.drag_offset)
+                self.setPos(new_pos)
             event.accept()
         else:
             super().mouseMoveEvent(event)
     
     def hoverMoveEvent(self, event):
-        resize_area = self.isInResizeArea(event.pos())
-        if resize_area in ['top-left', 'bottom-right']:
-            self.setCursor(Qt.CursorShape.SizeFDiagCursor)
-        elif resize_area in ['top-right', 'bottom-left']:
-            self.setCursor(Qt.CursorShape.SizeBDiagCursor)
-        elif resize_area in ['left', 'right']:
-            self.setCursor(Qt.CursorShape.SizeHorCursor)
-        elif resize_area in ['top', 'bottom']:
-            self.setCursor(Qt.CursorShape.SizeVerCursor)
-        elif self.isInHeader(event.pos()):
-            self.setCursor(Qt.CursorShape.OpenHandCursor)
-        else:
-            self.unsetCursor()
+        with instrumentation.timed('note.hover'):
+            resize_area = self.isInResizeArea(event.pos())
+            if resize_area in ['top-left', 'bottom-right']:
+                self.set_hover_cursor(Qt.CursorShape.SizeFDiagCursor)
+            elif resize_area in ['top-right', 'bottom-left']:
+                self.set_hover_cursor(Qt.CursorShape.SizeBDiagCursor)
+            elif resize_area in ['left', 'right']:
+                self.set_hover_cursor(Qt.CursorShape.SizeHorCursor)
+            elif resize_area in ['top', 'bottom']:
+                self.set_hover_cursor(Qt.CursorShape.SizeVerCursor)
+            elif self.isInHeader(event.pos()):
+                self.set_hover_cursor(Qt.CursorShape.OpenHandCursor)
+            else:
+                self.set_hover_cursor(None)
         super().hoverMoveEvent(event)
     
     def hoverLeaveEvent(self, event):
-        self.unsetCursor()
+        self.set_hover_cursor(None)
         super().hoverLeaveEvent(event)
 
+class NotePlaceholder(QGraphicsRectItem):
+    """Lightweight stand-in for an off-screen note holding only geometry, color
+    and a content preview (shown as its tooltip).
+    
+    Mirrors the parts of the proxy API the main window relies on (pos,
+    geometry, widget) so both can live in the same note map.
+    """
+    content_margin = 10  # Matches the NoteWidget layout margins
+    preview_length = 200  # Matches models.PREVIEW_LENGTH
+    min_size = (300, 200)  # Matches the NoteWidget minimum size, so layouts hold once it's built
+    
+    def __init__(self, note_id, rect, color, preview=None):
+        super().__init__(0, 0, max(rect.width(), self.min_size[0]), max(rect.height(), self.min_size[1]))
+        self.note_id = note_id
+        self.setPos(rect.topLeft())
+        self.setPen(QPen(QColor("#333333"), 0))
+        self.set_color(color)
+        self.set_preview(preview)
+    
+    def set_preview(self, text):
+        self.setToolTip((text or "")[:self.preview_length])
+    
+    def set_color(self, color):
+        self.color = color
+        self.setBrush(QBrush(QColor(color)))
+    
+    def geometry(self):
+        return QRectF(self.pos(), self.rect().size())
+    
+    def setGeometry(self, rect):
+        self.setPos(rect.topLeft())
+        self.setRect(0, 0, max(rect.width(), self.min_size[0]), max(rect.height(), self.min_size[1]))
+    
+    def widget(self):
+        return None
+    
+    def paint(self, painter, option, widget=None):
+        margin = self.content_margin
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < 0.2:
+            # Zoomed far out (e.g. fitting a large board) outline and corners are invisible
+            painter.fillRect(self.rect().adjusted(margin, margin, -margin, -margin), self.brush())
+            return
+        painter.setPen(self.pen())
+        painter.setBrush(self.brush())
+        painter.drawRoundedRect(self.rect().adjusted(margin, margin, -margin, -margin), 5, 5)
+
+class SceneBounds:
+    """Bounding rect of the notes on the board, kept up to date note by note.
+    
+    Each edge is the top of a heap of the notes' edges. Entries left behind by a
+    moved or removed note stay in the heaps and are dropped once they surface,
+    so an update is O(log n) and reading the rect never walks the notes.
+    """
+    
+    def __init__(self):
+        self._edges = {}  # note_id -> (left, top, right, bottom)
+        self._heaps = ([], [], [], [])  # Keys: left, top, -right, -bottom
+    
+    def __len__(self):
+        return len(self._edges)
+    
+    def note_rect(self, note_id):
+        """The rect last recorded for a note, or None."""
+        edges = self._edges.get(note_id)
+        return QRectF(QPointF(edges[0], edges[1]), QPointF(edges[2], edges[3])) if edges else None
+    
+    def update(self, note_id, rect):
+        edges = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        if self._edges.get(note_id) == edges:
+            return
+        self._edges[note_id] = edges
+        for index, heap in enumerate(self._heaps):
+            heapq.heappush(heap, (-edges[index] if index >= 2 else edges[index], note_id))
+        self._compact()
+    
+    def remove(self, note_id):
+        if self._edges.pop(note_id, None) is not None:
+            self._compact()
+    
+    def clear(self):
+        self._edges.clear()
+        for heap in self._heaps:
+            heap.clear()
+    
+    def rect(self):
+        """The notes' bounding rect, or a null QRectF without notes."""
+        if not self._edges:
+            return QRectF()
+        left, top, right, bottom = (self._edge(index) for index in range(4))
+        return QRectF(QPointF(left, top), QPointF(right, bottom))
+    
+    def _edge(self, index):
+        heap = self._heaps[index]
+        while True:
+            key, note_id = heap[0]
+            edge = -key if index >= 2 else key
+            edges = self._edges.get(note_id)
+            if edges is not None and edges[index] == edge:
+                return edge
+            heapq.heappop(heap)
+    
+    def _compact(self):
+        # Rebuilt once stale entries outnumber live ones three to one
+        if len(self._heaps[0]) <= 4 * len(self._edges) + 64:
+            return
+        for index, heap in enumerate(self._heaps):
+            heap[:] = [(-edges[index] if index >= 2 else edges[index], note_id)
+                       for note_id, edges in self._edges.items()]
+            heapq.heapify(heap)
+
+class PerformanceOverlay(QLabel):
+    """Corner panel showing the instrumentation counters and timings."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setFont(QFont("monospace", 9))
+        self.setStyleSheet("""
+            background-color: rgba(0, 0, 0, 180);
+            color: #cccccc;
+            border-radius: 5px;
+            padding: 8px;
+        """)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+    
+    def toggle(self):
+        if self.isVisible():
+            self._timer.stop()
+            self.hide()
+            return
+        self.refresh()
+        self.show()
+        self.raise_()
+        self._timer.start(500)
+    
+    def refresh(self):
+        if not instrumentation.enabled:
+            self.setText("Instrumentation is off, start with NOTES_INSTRUMENT=1")
+        else:
+            self.setText("\n".join(instrumentation.summary_lines()))
+        self.adjustSize()
+        self.move(10, 10)
+
+class Minimap(QWidget):
+    """Overview of the whole board, docked in a corner of the view.
+    
+    Notes are drawn as colored rectangles into a cached low-resolution image;
+    after a change only the image areas of the notes involved are redrawn, found
+    through the scene index. Painting the widget is one image blit plus the
+    viewport frame. Clicking or dragging centers the view on that point.
+    """
+    background_color = QColor("#141414")
+    viewport_color = QColor("#ffffff")
+    
+    def __init__(self, board):
+        super().__init__(board)
+        self.board = board
+        self.setFixedSize(220, 150)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.world_slack = 0.1  # Fraction of the notes' bounds kept free around them
+        self.max_dirty_rects = 64  # More pending changes than this redraw everything
+        self.full_refresh_delay = 200  # Milliseconds; coalesces a loading board's batches
+        self._image = None
+        self._transform = QTransform()  # Scene to image pixels
+        self._world = QRectF()  # Scene area the image covers
+        self._dirty = []  # Scene rects to redraw
+        self._full = True
+        self._brushes = {}  # Note color name -> QBrush, filling with a QColor converts each time
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self.refresh)
+    
+    def invalidate(self, rect=None):
+        """Redraw the notes in a scene rect, or everything without one."""
+        if rect is None or len(self._dirty) >= self.max_dirty_rects:
+            self._full = True
+            self._dirty.clear()
+        elif not self._full:
+            self._dirty.append(rect)
+        self.schedule_refresh()
+    
+    def schedule_refresh(self):
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start(self.full_refresh_delay if self._full else 0)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_refresh()
+    
+    @instrumentation.instrument('minimap.refresh')
+    def refresh(self):
+        if not self.isVisible():
+            return  # Picked up again by showEvent
+        if self.board._move_animation is not None:
+            return  # Mid-flight positions; finish_animation schedules another pass
+        
+        content = self.board.note_bounds.rect()
+        ratio = self.devicePixelRatioF()
+        size = self.size() * ratio
+        if self._image is None or self._image.width() != int(size.width()) \
+                or self._image.height() != int(size.height()):
+            self._image = QImage(int(size.width()), int(size.height()), QImage.Format.Format_ARGB32_Premultiplied)
+            self._full = True
+        if not content.isNull() and (not self._world.contains(content) or (
+                content.width() < self._world.width() / 3 and content.height() < self._world.height() / 3)):
+            self._fit_world(content)
+        
+        if self._full:
+            regions = [QRectF(self._image.rect())]
+        else:
+            regions = [self._transform.mapRect(rect) for rect in self._dirty]
+        self._full = False
+        self._dirty.clear()
+        
+        painter = QPainter(self._image)
+        transform = self._transform
+        inverse = transform.inverted()[0]
+        brushes = self._brushes
+        for region in regions:
+            target = region.toAlignedRect().intersected(self._image.rect())
+            if target.isEmpty():
+                continue
+            painter.setClipRect(target)
+            painter.fillRect(target, self.background_color)
+            # Bottom-most first, like the scene paints them. Bounding rects are
+            # enough for notes and much cheaper to test than shapes.
+            items = self.board.scene.items(inverse.mapRect(QRectF(target)),
+                                           Qt.ItemSelectionMode.IntersectsItemBoundingRect,
+                                           Qt.SortOrder.AscendingOrder)
+            for item in items:
+                if isinstance(item, NotePlaceholder):
+                    color = item.color
+                elif isinstance(item, DraggableProxyWidget) and item.widget() is not None:
+                    color = item.widget().color
+                else:
+                    continue
+                if not item.isVisible():
+                    continue
+                rect = transform.mapRect(item.sceneBoundingRect())
+                if rect.width() < 1 or rect.height() < 1:
+                    # At least a pixel, so small notes don't vanish
+                    rect.setWidth(max(rect.width(), 1.0))
+                    rect.setHeight(max(rect.height(), 1.0))
+                brush = brushes.get(color)
+                if brush is None:
+                    brush = brushes[color] = QBrush(QColor(color))
+                painter.fillRect(rect, brush)
+        painter.end()
+        self.update()
+    
+    def _fit_world(self, content):
+        # The image maps the notes' bounds plus slack, centered, at one scale
+        slack_x = content.width() * self.world_slack + 500
+        slack_y = content.height() * self.world_slack + 500
+        area = content.adjusted(-slack_x, -slack_y, slack_x, slack_y)
+        scale = min(self._image.width() / area.width(), self._image.height() / area.height())
+        dx = (self._image.width() - area.width() * scale) / 2 - area.left() * scale
+        dy = (self._image.height() - area.height() * scale) / 2 - area.top() * scale
+        self._transform = QTransform(scale, 0, 0, scale, dx, dy)
+        self._world = self._transform.inverted()[0].mapRect(QRectF(self._image.rect()))
+        self._full = True
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self._image is None:
+            painter.fillRect(self.rect(), self.background_color)
+        else:
+            painter.drawImage(QRectF(self.rect()), self._image)
+        
+        # The part of the board the view shows
+        ratio = self.devicePixelRatioF()
+        visible = self.board.mapToScene(self.board.viewport().rect()).boundingRect()
+        frame = self._transform.mapRect(visible)
+        frame = QRectF(frame.topLeft() / ratio, frame.size() / ratio)
+        painter.setPen(QPen(self.viewport_color, 1))
+        painter.drawRect(frame.intersected(QRectF(self.rect()).adjusted(0, 0, -1, -1)))
+        painter.setPen(QPen(QColor("#404040"), 1))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.pan_to(event.position())
+        event.accept()
+    
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.pan_to(event.position())
+        event.accept()
+    
+    def pan_to(self, pos):
+        """Center the view on the board point under a minimap position."""
+        self.board.finish_animation()
+        point = self._transform.inverted()[0].map(pos * self.devicePixelRatioF())
+        self.board.centerOn(point)
+
+
 class BoardView(QGraphicsView):
     zoom_changed = pyqtSignal(float)  # Signal to emit when zoom changes
+    note_item_changed = pyqtSignal(int, object)  # (note_id, proxy or placeholder) when virtualization swaps items
+    note_geometry_committed = pyqtSignal(int, QRectF, QRectF)  # (note_id, before, after) after a drag or resize
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -202,48 +550,135 @@ class BoardView(QGraphicsView):
         self.zoom_factor = 1.0
         self.min_zoom = 0.3  # Increased minimum zoom to ensure notes are still grabbable
         self.max_zoom = 3.0
+        self.fit_min_zoom = 0.01  # Zoom to fit may go below min_zoom to show a large board
+        self.fit_padding = 50  # Pixels around the notes when fitting
         self.is_panning = False
         self.last_mouse_pos = None
         
+        # Virtualization: off-screen notes are kept as placeholders
+        self.virtualized = False
+        self.note_factory = None  # Callable(note_id, recycled_widget) -> NoteWidget or None
+        self.materialize_margin = 0.5  # Extra viewport fraction materialized around the view
+        self.materialize_min_zoom = 0.4  # Below this notes aren't interactive anyway
+        self.materialize_batch = 40  # Widgets built per pass, the rest follow next pass
+        self.pool_limit = 50  # Recycled proxies kept for reuse
+        self._placeholders = {}  # note_id -> NotePlaceholder
+        self._materialized = {}  # note_id -> DraggableProxyWidget
+        self._pool = []
+        self._virtualize_timer = QTimer(self)
+        self._virtualize_timer.setSingleShot(True)
+        self._virtualize_timer.timeout.connect(self.update_materialized)
+        self.zoom_changed.connect(self.schedule_virtualization)
+        
+        # Layout transitions, see animate_moves
+        self.move_duration = 350  # Milliseconds
+        self.max_animated_moves = 500  # More notes than this on screen just jump
+        self._move_animation = None  # (animation, [(item, start, end)]) while one runs
+        
+        # The canvas is unbounded: the scrollable area follows the notes' bounds
+        # (see update_scene_rect) and the scene index covers them with some slack
+        self.note_bounds = SceneBounds()
+        self.scene_margin = 1000  # Beyond a viewport of room to pan past the outermost notes
+        self.index_slack = 0.5  # Fraction of the notes' bounds the index extends by when regrown
+        self.max_index_depth = 16
+        self._scene_rect_timer = QTimer(self)
+        self._scene_rect_timer.setSingleShot(True)
+        self._scene_rect_timer.timeout.connect(self.update_scene_rect)
+        self.zoom_changed.connect(self.schedule_scene_rect)
+        
+        # Overview in the bottom right corner, see Minimap
+        self.minimap = Minimap(self)
+        self.zoom_changed.connect(self.minimap.update)
+        
         # Set up the board
         self.setBackgroundBrush(QBrush(QColor("#1e1e1e")))
-        self.scene.setSceneRect(-4000, -4000, 8000, 8000)  # Large canvas
+        self.scene.setSceneRect(-4000, -4000, 8000, 8000)  # Index extent until there are notes
+        
+        # Grid settings, painted in drawBackground
+        self.grid_size = 100
+        self.major_grid_every = 5  # Every fifth line is a major line
+        self.grid_minor_color = QColor("#232323")
+        self.grid_major_color = QColor("#2d2d2d")
+        self.grid_fade_start = 0.6  # Minor lines start fading below this zoom
+        self.grid_fade_end = 0.35   # ...and are gone below this one
         
-        # Draw grid
-        self.draw_grid()
+        self.performance_overlay = PerformanceOverlay(self)
     
-    def draw_grid(self):
-        # Draw major grid lines
-        pen_major = QPen(QColor("#2d2d2d"), 1, Qt.PenStyle.SolidLine)
-        pen_minor = QPen(QColor("#232323"), 1, Qt.PenStyle.SolidLine)
+    def paintEvent(self, event):
+        with instrumentation.timed('board.paint'):
+            super().paintEvent(event)
+    
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
         
-        # Draw grid lines
-        grid_size = 100
-        rect = self.scene.sceneRect()
+        # Only lines crossing the exposed area are drawn
+        grid_size = self.grid_size
+        major_size = grid_size * self.major_grid_every
+        first_col = math.floor(rect.left() / grid_size)
+        last_col = math.ceil(rect.right() / grid_size)
+        first_row = math.floor(rect.top() / grid_size)
+        last_row = math.ceil(rect.bottom() / grid_size)
         
-        # Minor grid lines
-        for x in range(int(rect.left()), int(rect.right()), grid_size):
-            self.scene.addLine(x, rect.top(), x, rect.bottom(), pen_minor)
-        for y in range(int(rect.top()), int(rect.bottom()), grid_size):
-            self.scene.addLine(rect.left(), y, rect.right(), y, pen_minor)
-            
-        # Major grid lines
-        major_grid_size = grid_size * 5
-        for x in range(int(rect.left()), int(rect.right()), major_grid_size):
-            self.scene.addLine(x, rect.top(), x, rect.bottom(), pen_major)
-        for y in range(int(rect.top()), int(rect.bottom()), major_grid_size):
-            self.scene.addLine(rect.left(), y, rect.right(), y, pen_major)
+        minor_lines, major_lines = [], []
+        for col in range(first_col, last_col + 1):
+            x = col * grid_size
+            line = QLineF(x, rect.top(), x, rect.bottom())
+            (major_lines if x % major_size == 0 else minor_lines).append(line)
+        for row in range(first_row, last_row + 1):
+            y = row * grid_size
+            line = QLineF(rect.left(), y, rect.right(), y)
+            (major_lines if y % major_size == 0 else minor_lines).append(line)
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        
+        # Minor lines fade out as the view zooms out
+        fade_range = self.grid_fade_start - self.grid_fade_end
+        minor_alpha = min(1.0, max(0.0, (self.zoom_factor - self.grid_fade_end) / fade_range))
+        if minor_alpha > 0 and minor_lines:
+            color = QColor(self.grid_minor_color)
+            color.setAlphaF(minor_alpha)
+            pen = QPen(color, 0)  # Cosmetic: one pixel wide at any zoom
+            painter.setPen(pen)
+            painter.drawLines(minor_lines)
+        
+        if major_lines:
+            painter.setPen(QPen(self.grid_major_color, 0))
+            painter.drawLines(major_lines)
+        painter.restore()
     
     def reset_zoom(self):
-        # Calculate the zoom factor needed to return to 1.0
-        reset_factor = 1.0 / self.zoom_factor
+        self.set_zoom(1.0)
+    
+    def set_zoom(self, zoom_factor):
+        # Scale by the ratio to the current zoom
+        reset_factor = zoom_factor / self.zoom_factor
         self.scale(reset_factor, reset_factor)
-        self.zoom_factor = 1.0
+        self.zoom_factor = zoom_factor
         
         # Emit the zoom changed signal
         self.zoom_changed.emit(self.zoom_factor)
     
+    def zoom_to_fit(self):
+        """Zoom and center the view so every note is visible.
+        
+        Uses the maintained note bounds, so it doesn't walk the items. Small
+        boards aren't blown up past 100%.
+        """
+        content = self.note_bounds.rect()
+        if content.isNull():
+            return
+        padding = 2 * self.fit_padding  # Pixels, on both sides
+        viewport = self.viewport().rect()
+        zoom = min(max(1, viewport.width() - padding) / max(1.0, content.width()),
+                   max(1, viewport.height() - padding) / max(1.0, content.height()))
+        self.set_zoom(max(self.fit_min_zoom, min(zoom, 1.0)))
+        self.update_scene_rect()  # Room to center on the notes at the new zoom
+        self.centerOn(content.center())
+        self.schedule_virtualization()
+    
     def mousePressEvent(self, event):
+        self.finish_animation()  # Don't grab a note that is still on its way
         item = self.itemAt(event.pos())
         
         # Only allow interaction with items when zoom is above threshold
@@ -277,12 +712,13 @@ class BoardView(QGraphicsView):
     
     def mouseMoveEvent(self, event):
         if self.is_panning and self.last_mouse_pos is not None:
-            delta = event.pos() - self.last_mouse_pos
-            self.horizontalScrollBar().setValue(
-                self.horizontalScrollBar().value() - delta.x())
-            self.verticalScrollBar().setValue(
-                self.verticalScrollBar().value() - delta.y())
-            self.last_mouse_pos = event.pos()
+            with instrumentation.timed('board.pan'):
+                delta = event.pos() - self.last_mouse_pos
+                self.horizontalScrollBar().setValue(
+                    self.horizontalScrollBar().value() - delta.x())
+                self.verticalScrollBar().setValue(
+                    self.verticalScrollBar().value() - delta.y())
+                self.last_mouse_pos = event.pos()
             event.accept()
         else:
             super().mouseMoveEvent(event)
@@ -294,28 +730,296 @@ class BoardView(QGraphicsView):
             zoom_factor = 1.1 if zoom_in else 0.9
             
             new_zoom = self.zoom_factor * zoom_factor
-            if self.min_zoom <= new_zoom <= self.max_zoom:
-                self.zoom_factor = new_zoom
-                self.scale(zoom_factor, zoom_factor)
-                
-                # Emit the zoom changed signal
-                self.zoom_changed.emit(self.zoom_factor)
+            # Zooming back in is allowed below min_zoom, where zoom_to_fit may have left it
+            if (self.min_zoom <= new_zoom or zoom_in) and new_zoom <= self.max_zoom:
+                with instrumentation.timed('board.zoom'):
+                    self.zoom_factor = new_zoom
+                    self.scale(zoom_factor, zoom_factor)
+                    
+                    # Emit the zoom changed signal
+                    self.zoom_changed.emit(self.zoom_factor)
                 
             event.accept()
         else:
             # Regular scroll
             super().wheelEvent(event)
     
-    def add_note(self, note_widget, pos=None):
+    def add_note(self, note_widget, pos=None, size=None):
         if pos is None:
             pos = self.mapToScene(self.viewport().rect().center())
         
-        proxy = DraggableProxyWidget()
-        proxy.setWidget(note_widget)
+        proxy = self._create_proxy(note_widget)
         self.scene.addItem(proxy)
         proxy.setPos(pos)
+        if size is not None:
+            proxy.setGeometry(QRectF(pos, size))
+        if self.virtualized:
+            self._materialized[note_widget.note_id] = proxy
+        self._track(note_widget.note_id, proxy.geometry())
         return proxy 
     
+    def _create_proxy(self, note_widget):
+        proxy = DraggableProxyWidget()
+        proxy.setWidget(note_widget)
+        proxy.geometry_committed.connect(self._on_geometry_committed)
+        return proxy
+    
+    def _on_geometry_committed(self, before, after):
+        note_widget = self.sender().widget()
+        if note_widget is not None and note_widget.note_id is not None:
+            self._track(note_widget.note_id, after)
+            self.note_geometry_committed.emit(note_widget.note_id, before, after)
+    
+    def set_virtualized(self, enabled, note_factory=None):
+        """Switch virtualization on or off.
+        
+        While on, notes are added with add_placeholder and only those near the
+        viewport get a real widget, built by ``note_factory(note_id, recycled)``.
+        ``recycled`` is a pooled NoteWidget to reconfigure, or None.
+        """
+        self.virtualized = enabled
+        self.note_factory = note_factory
+    
+    def add_placeholder(self, note_id, rect, color, preview=None):
+        placeholder = NotePlaceholder(note_id, rect, color, preview)
+        self.scene.addItem(placeholder)
+        self._placeholders[note_id] = placeholder
+        self._track(note_id, placeholder.geometry())
+        return placeholder
+    
+    def remove_note(self, note_id, item):
+        """Remove a note's proxy or placeholder from the board for good."""
+        if item.scene() is self.scene:
+            self.scene.removeItem(item)
+        self._materialized.pop(note_id, None)
+        placeholder = self._placeholders.pop(note_id, None)
+        if placeholder is not None and placeholder.scene() is self.scene:
+            self.scene.removeItem(placeholder)
+        previous = self.note_bounds.note_rect(note_id)
+        if previous is not None:
+            self.minimap.invalidate(previous)
+        self.note_bounds.remove(note_id)
+        self.schedule_scene_rect()
+    
+    def clear_notes(self):
+        """Remove every note item, including pooled ones."""
+        self.finish_animation()
+        self.scene.clear()
+        self._placeholders.clear()
+        self._materialized.clear()
+        self._pool.clear()
+        self.note_bounds.clear()
+        self.minimap.invalidate()
+        self.schedule_scene_rect()
+    
+    def notes_changed(self, items):
+        """Track notes (proxies or placeholders) moved, resized, recolored or hidden directly.
+        
+        Drags, resizes, animate_moves and adding or removing notes are tracked already.
+        """
+        for item in items:
+            self._track(self._note_id(item), item.geometry())
+    
+    @staticmethod
+    def _note_id(item):
+        return item.note_id if isinstance(item, NotePlaceholder) else item.widget().note_id
+    
+    def _track(self, note_id, rect):
+        if note_id is None:
+            return
+        previous = self.note_bounds.note_rect(note_id)
+        if previous is not None:
+            self.minimap.invalidate(previous)
+        self.minimap.invalidate(rect)
+        self.note_bounds.update(note_id, rect)
+        self.schedule_scene_rect()
+    
+    def schedule_scene_rect(self):
+        # Coalesces a load batch or a whole arrange into one update
+        if not self._scene_rect_timer.isActive():
+            self._scene_rect_timer.start(0)
+    
+    @instrumentation.instrument('board.update_scene_rect')
+    def update_scene_rect(self):
+        """Fit the scrollable area and the scene index to the notes' bounds.
+        
+        The view can scroll a viewport and ``scene_margin`` past the outermost
+        notes, and never away from what it shows. The scene rect, which the BSP
+        index partitions, is only replaced when the notes outgrow it or take up
+        a small part of it, since that rebuilds the index.
+        """
+        content = self.note_bounds.rect()
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        margin_x = visible.width() + self.scene_margin
+        margin_y = visible.height() + self.scene_margin
+        if content.isNull():
+            self.setSceneRect(visible.adjusted(-margin_x, -margin_y, margin_x, margin_y))
+            return
+        self.setSceneRect(content.adjusted(-margin_x, -margin_y, margin_x, margin_y).united(visible))
+        
+        indexed = self.scene.sceneRect()
+        slack_x = content.width() * self.index_slack + self.scene_margin
+        slack_y = content.height() * self.index_slack + self.scene_margin
+        grown = content.adjusted(-slack_x, -slack_y, slack_x, slack_y)
+        if not indexed.contains(content) or \
+                indexed.width() * indexed.height() > 4 * grown.width() * grown.height():
+            self.scene.setSceneRect(grown)
+            indexed = grown
+        
+        # Leaves of about a dozen notes, but no smaller than a few notes' area
+        count = len(self.note_bounds)
+        note_area = NotePlaceholder.min_size[0] * NotePlaceholder.min_size[1]
+        by_count = math.ceil(math.log2(count / 12)) if count > 12 else 0
+        by_area = int(math.log2(max(1.0, indexed.width() * indexed.height() / (4 * note_area))))
+        depth = max(1, min(by_count, by_area, self.max_index_depth))
+        if depth != self.scene.bspTreeDepth():
+            self.scene.setBspTreeDepth(depth)
+    
+    def schedule_virtualization(self):
+        # Coalesce bursts of scroll/zoom/resize events into one pass
+        if self.virtualized and not self._virtualize_timer.isActive():
+            self._virtualize_timer.start(0)
+    
+    @instrumentation.instrument('board.update_materialized')
+    def update_materialized(self):
+        """Swap placeholders near the viewport for widgets and release the rest."""
+        if not self.virtualized or self.note_factory is None:
+            return
+        if self._move_animation is not None:
+            return  # Swapping items mid-flight would strand them; runs when it ends
+        
+        view_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        dx = view_rect.width() * self.materialize_margin
+        dy = view_rect.height() * self.materialize_margin
+        region = view_rect.adjusted(-dx, -dy, dx, dy)
+        if self.zoom_factor < self.materialize_min_zoom:
+            region = QRectF()
+        
+        # Release widgets that left the region (or were hidden by a search)
+        for note_id, proxy in list(self._materialized.items()):
+            if proxy.dragging or proxy.resizing or proxy.hasFocus():
+                continue
+            if not proxy.isVisible() or not region.intersects(proxy.geometry()):
+                self._release(note_id, proxy)
+        
+        if region.isEmpty():
+            return
+        
+        # Materialize placeholders that entered it, a batch at a time
+        pending = [item for item in self.scene.items(region)
+                   if isinstance(item, NotePlaceholder) and item.isVisible()]
+        for placeholder in pending[:self.materialize_batch]:
+            self._materialize(placeholder)
+        if len(pending) > self.materialize_batch:
+            self.schedule_virtualization()
+    
+    def _materialize(self, placeholder):
+        proxy = self._pool.pop() if self._pool else None
+        note_widget = self.note_factory(placeholder.note_id, proxy.widget() if proxy else None)
+        if note_widget is None:
+            if proxy is not None:
+                self._pool.append(proxy)
+            return
+        
+        if proxy is None:
+            proxy = self._create_proxy(note_widget)
+        self.scene.removeItem(placeholder)
+        self.scene.addItem(proxy)
+        proxy.setGeometry(placeholder.geometry())
+        self._materialized[placeholder.note_id] = proxy
+        self.minimap.invalidate(proxy.geometry())  # Re-added items stack on top
+        self.note_item_changed.emit(placeholder.note_id, proxy)
+    
+    def _release(self, note_id, proxy):
+        placeholder = self._placeholders.get(note_id)
+        note_widget = proxy.widget()
+        preview = note_widget.content_edit.toPlainText()[:NotePlaceholder.preview_length]
+        if placeholder is None:
+            placeholder = NotePlaceholder(note_id, proxy.geometry(), note_widget.color, preview)
+            self._placeholders[note_id] = placeholder
+        else:
+            placeholder.setGeometry(proxy.geometry())
+            placeholder.set_color(note_widget.color)
+            placeholder.set_preview(preview)
+        placeholder.setVisible(proxy.isVisible())
+        
+        self.scene.removeItem(proxy)
+        self.scene.addItem(placeholder)
+        del self._materialized[note_id]
+        self.minimap.invalidate(placeholder.geometry())
+        self.note_item_changed.emit(note_id, placeholder)
+        
+        if len(self._pool) < self.pool_limit:
+            proxy.setVisible(True)
+            self._pool.append(proxy)
+    
+    def animate_moves(self, targets):
+        """Move items to new positions ({item: QPointF}) in one animated transition.
+        
+        Only items on screen before or after the move are animated (up to
+        ``max_animated_moves``); the rest are placed directly.
+        """
+        self.finish_animation()
+        view_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        moves = []
+        for item, end in targets.items():
+            start = item.pos()
+            if start == end:
+                continue
+            size = item.geometry().size()
+            self._track(self._note_id(item), QRectF(end, size))
+            on_screen = view_rect.intersects(QRectF(start, size)) or view_rect.intersects(QRectF(end, size))
+            if on_screen and item.isVisible() and len(moves) < self.max_animated_moves:
+                moves.append((item, start, end))
+            else:
+                item.setPos(end)
+        if not moves:
+            self.schedule_virtualization()
+            return
+        
+        animation = QVariantAnimation(self)
+        animation.setStartValue(0.0)
+        animation.setEndValue(1.0)
+        animation.setDuration(self.move_duration)
+        animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+        animation.valueChanged.connect(self._step_moves)
+        animation.finished.connect(self.finish_animation)
+        self._move_animation = (animation, moves)
+        animation.start()
+    
+    def _step_moves(self, progress):
+        if self._move_animation is None:
+            return
+        with instrumentation.timed('board.animate'):
+            for item, start, end in self._move_animation[1]:
+                item.setPos(start + (end - start) * progress)
+    
+    def finish_animation(self):
+        """Jump a running layout transition to its end."""
+        if self._move_animation is None:
+            return
+        animation, moves = self._move_animation
+        self._move_animation = None
+        animation.stop()
+        animation.deleteLater()
+        for item, _, end in moves:
+            item.setPos(end)
+        self.schedule_virtualization()
+        self.minimap.schedule_refresh()
+    
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.schedule_virtualization()
+        self.minimap.update()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_virtualization()
+        self.schedule_scene_rect()
+        # Keep the minimap docked in the bottom right corner
+        self.minimap.move(self.width() - self.minimap.width() - 10,
+                          self.height() - self.minimap.height() - 10)
+    
     def get_viewport_state(self):
         """Get the current viewport state including position and zoom."""
         center = self.mapToScene(self.viewport().rect().center())
@@ -341,6 +1045,11 @@ class BoardView(QGraphicsView):
                 zoom_percentage = int(self.zoom_factor * 100)
                 self.parent().zoom_label.setText(f"Zoom: {zoom_percentage}%")
         
-        # Restore position
+        # Restore position; the notes may not be loaded yet, so make room for it
         if 'center_x' in state and 'center_y' in state:
-            self.centerOn(state['center_x'], state['center_y']) 
\ No newline at end of file
+            center = QPointF(state['center_x'], state['center_y'])
+            visible = self.mapToScene(self.viewport().rect()).boundingRect()
+            visible.moveCenter(center)
+            self.setSceneRect(self.sceneRect().united(visible))
+            self.centerOn(center)
+        self.schedule_virtualization() 
\ No newline at end of file
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from typing import Dict, Optional
+
+from models import Note
+
+# Columns whose last persisted value is tracked per note
+TRACKED_FIELDS = ('title', 'content', 'color', 'text_size',
+                  'position_x', 'position_y', 'width', 'height')
+GEOMETRY_FIELDS = ('position_x', 'position_y', 'width', 'height')
+
+
+def content_digest(content: Optional[str]) -> Optional[bytes]:
+    """Hash note content so large notes can be compared without keeping a copy."""
+    if content is None:
+        return None
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+class ChangeTracker:
+    """Remembers the last persisted state of each note so no-op writes can be skipped.
+
+    Shared between the GUI-thread and autosave NoteOperations, so all access is
+    guarded by a lock.
+    """
+
+    def __init__(self):
+        self._state: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self.performed = 0  # Note writes that reached the database
+        self.skipped = 0    # Write requests dropped because nothing changed
+
+    def remember(self, note: Note):
+        """Record a note's state as loaded from or written to the database.
+
+        ``note`` may also be a row with only some columns (e.g. board metadata
+        without content); fields it lacks stay unknown and always count as changed.
+        """
+        self.mark_persisted(note.id, {field: getattr(note, field) for field in TRACKED_FIELDS
+                                      if hasattr(note, field)},
+                            count=False)
+
+    def changed_fields(self, note_id: int, fields: dict) -> dict:
+        """Return the subset of ``fields`` that differs from the persisted state.
+
+        Notes that were never remembered are treated as entirely changed. An
+        empty result is counted as a skipped write.
+        """
+        with self._lock:
+            known = self._state.get(note_id)
+            if known is None:
+                return dict(fields)
+
+            changed = {}
+            for field, value in fields.items():
+                stored = content_digest(value) if field == 'content' else value
+                if field not in known or known[field] != stored:
+                    changed[field] = value
+            if not changed:
+                self.skipped += 1
+            return changed
+
+    def mark_persisted(self, note_id: int, fields: dict, count: bool = True):
+        """Record that ``fields`` were written for a note."""
+        with self._lock:
+            state = self._state.setdefault(note_id, {})
+            for field, value in fields.items():
+                if field in TRACKED_FIELDS:
+                    state[field] = content_digest(value) if field == 'content' else value
+            if count:
+                self.performed += 1
+
+    def forget(self, note_id: int):
+        with self._lock:
+            self._state.pop(note_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'performed': self.performed, 'skipped': self.skipped}
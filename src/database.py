@@ -1,22 +1,105 @@
-from sqlalchemy import create_engine
+import os
+import re
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from models import Base as ModelsBase
 from note_operations import Base as OperationsBase
+import instrumentation
+import migrations
+
+# SQLite pragmas applied to every new connection, by profile name
+ENGINE_PROFILES = {
+    # WAL with NORMAL sync: commits don't fsync, which suits frequent autosaves
+    'default': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,  # 256 MB
+        'cache_size': -65536,    # 64 MB (negative values are KiB)
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,    # ms
+    },
+    # WAL but fsync on every commit
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # SQLite's own defaults (rollback journal, full sync)
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 0,
+    },
+}
+DEFAULT_PROFILE = 'default'
+DEFAULT_PATH = 'notes.db'
+
+_PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def engine_settings(profile=None):
+    """Resolve the pragma settings for a profile, with environment overrides.
+
+    The profile comes from ``profile`` or ``NOTES_DB_PROFILE``; single pragmas
+    can be overridden with ``NOTES_SQLITE_<PRAGMA>`` (e.g. NOTES_SQLITE_SYNCHRONOUS).
+    """
+    name = profile or os.getenv('NOTES_DB_PROFILE', DEFAULT_PROFILE)
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile {name!r}, expected one of {sorted(ENGINE_PROFILES)}")
+
+    settings = dict(ENGINE_PROFILES[name])
+    for pragma in settings:
+        value = os.getenv(f'NOTES_SQLITE_{pragma.upper()}')
+        if value is not None:
+            settings[pragma] = value.strip()
+    for pragma, value in settings.items():
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid value {value!r} for SQLite pragma {pragma}")
+    return settings
+
+
+def apply_pragmas(engine, settings):
+    """Run the given pragmas on every connection the engine opens."""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in settings.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
 
 class Database:
-    def __init__(self):
-        self.engine = create_engine('sqlite:///notes.db')
+    def __init__(self, path=None, profile=None):
+        # Settings may come from a .env file next to where the app is started
+        load_dotenv()
+        self.path = path or os.getenv('NOTES_DB_PATH', DEFAULT_PATH)
+        self.settings = engine_settings(profile)
         
-        # Create all tables
-        ModelsBase.metadata.create_all(self.engine)
-        OperationsBase.metadata.create_all(self.engine)
+        self.engine = create_engine(f'sqlite:///{self.path}')
+        apply_pragmas(self.engine, self.settings)
+        
+        # Create tables and indexes (full-text, spatial, ...) unless already current
+        migrations.upgrade(self.engine, [ModelsBase.metadata, OperationsBase.metadata])
         
         # Create session
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self.Session = sessionmaker(bind=self.engine)
+        instrumentation.install_database(self.engine, self.Session)
+        self.session = self.Session()
     
     def get_session(self):
         return self.session
     
+    def create_session(self):
+        """Create an independent session, e.g. for use on a worker thread."""
+        return self.Session()
+    
     def close(self):
-        self.session.close() 
\ No newline at end of file
+        self.session.close()
+        self.engine.dispose() 
\ No newline at end of file
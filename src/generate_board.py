@@ -0,0 +1,159 @@
+"""Fill a notes database with a deterministic synthetic board for scale testing.
+
+The same seed and sizes always produce the same board. Notes get skewed
+content lengths (mostly short, a few long), positions clustered around a
+handful of areas of the canvas, the palette colors, text sizes around the
+default, a few pinned or archived notes and a set of tags. Rows are written
+with chunked bulk inserts.
+
+Usage: python src/generate_board.py --notes 100000 [--seed 1] [--db notes.db]
+                                    [--tags 40] [--clusters 30] [--replace]
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+import search_index
+import spatial_index
+from models import Note, Tag, note_tags, PREVIEW_LENGTH
+from theme import NOTE_COLORS
+
+VOCABULARY = (
+    "meeting agenda notes todo idea draft review budget plan project release "
+    "deadline client design sprint retro bug fix deploy server database query "
+    "index cache latency report summary question answer follow up call email "
+    "invoice travel book recipe grocery list birthday gift workout goal habit "
+    "alpha beta gamma delta research paper reference quote thought reminder"
+).split()
+TAG_NAMES = (
+    "work personal urgent later ideas reading projects home finance health "
+    "travel meetings research archive drafts family learning shopping code design"
+).split()
+TEXT_SIZES = [12, 13, 14, 14, 14, 14, 16, 16, 18, 20, 24]
+EPOCH = datetime(2024, 1, 1)  # Fixed so timestamps don't depend on when the board is built
+
+
+def _content(rng: random.Random) -> str:
+    if rng.random() < 0.05:
+        return ""
+    # Log-normal word counts: median ~40 words, a long tail of long notes
+    words = rng.choices(VOCABULARY, k=min(3000, max(1, int(rng.lognormvariate(3.7, 1.0)))))
+    lines, start = [], 0
+    while start < len(words):
+        end = start + rng.randint(6, 14)
+        lines.append(" ".join(words[start:end]))
+        start = end
+    return "\n".join(lines)
+
+
+def _clusters(rng: random.Random, count: int, notes: int):
+    # Spread cluster centers so a bigger board also covers more canvas
+    extent = 2000 + 40 * math.sqrt(notes)
+    return [(rng.uniform(-extent, extent), rng.uniform(-extent, extent), rng.uniform(300, 1500))
+            for _ in range(count)]
+
+
+def _note_rows(rng: random.Random, count: int, first_id: int, clusters):
+    colors = list(NOTE_COLORS.values())
+    for offset in range(count):
+        cx, cy, spread = rng.choice(clusters)
+        content = _content(rng)
+        created = EPOCH + timedelta(seconds=rng.uniform(0, 365 * 86400))
+        updated = created + timedelta(seconds=rng.expovariate(1 / (7 * 86400)))
+        yield {
+            'id': first_id + offset,
+            'title': " ".join(rng.choices(VOCABULARY, k=rng.randint(1, 4))) if rng.random() < 0.3 else "",
+            'content': content,
+            'preview': content[:PREVIEW_LENGTH],  # Saves the preview trigger a write per row
+            'created_at': created,
+            'updated_at': updated,
+            'color': rng.choice(colors),
+            'is_pinned': rng.random() < 0.02,
+            'is_archived': rng.random() < 0.05,
+            'position_x': int(rng.gauss(cx, spread)),
+            'position_y': int(rng.gauss(cy, spread)),
+            'width': rng.choice([250, 300, 300, 300, 350, 400]),
+            'height': rng.choice([150, 200, 200, 200, 250, 300]),
+            'text_size': rng.choice(TEXT_SIZES),
+        }
+
+
+def generate_board(engine, notes: int, seed: int = 1, tags: int = 20, clusters: int = 30,
+                   chunk_size: int = 5000, replace: bool = False) -> int:
+    """Insert ``notes`` synthetic notes (and up to ``tags`` tags) and return the count.
+
+    With ``replace`` the existing notes, tags and tag links are deleted first.
+    New notes are numbered after the highest existing id.
+    """
+    rng = random.Random(seed)
+    tag_names = [TAG_NAMES[i % len(TAG_NAMES)] + (f"-{i // len(TAG_NAMES)}" if i >= len(TAG_NAMES) else "")
+                 for i in range(tags)]
+    centers = _clusters(rng, max(1, clusters), notes)
+
+    with engine.begin() as connection:
+        if replace:
+            for table in (note_tags, Note.__table__, Tag.__table__):
+                connection.execute(delete(table))
+
+        existing = dict(connection.execute(select(Tag.name, Tag.id).where(Tag.name.in_(tag_names))).all())
+        missing = [{'name': name, 'color': rng.choice(list(NOTE_COLORS.values()))}
+                   for name in tag_names if name not in existing]
+        if missing:
+            connection.execute(insert(Tag), missing)
+            existing = dict(connection.execute(select(Tag.name, Tag.id).where(Tag.name.in_(tag_names))).all())
+        tag_ids = [existing[name] for name in tag_names]
+
+        first_id = (connection.execute(select(func.max(Note.id))).scalar() or 0) + 1
+        rows = _note_rows(rng, notes, first_id, centers)
+        with search_index.bulk_insert(connection) as index_text, \
+                spatial_index.bulk_insert(connection) as index_boxes:
+            for start in range(0, notes, chunk_size):
+                chunk = [next(rows) for _ in range(min(chunk_size, notes - start))]
+                connection.execute(insert(Note), chunk)
+                index_text(row['id'] for row in chunk)
+                index_boxes(row['id'] for row in chunk)
+                if tag_ids:
+                    connection.execute(insert(note_tags), _tag_links(rng, chunk, tag_ids))
+    return notes
+
+
+def _tag_links(rng: random.Random, rows, tag_ids):
+    # Most notes get zero to three tags, the first tags far more often than the rest
+    links = []
+    for row in rows:
+        k = min(len(tag_ids), int(rng.expovariate(1.0)))
+        chosen = {tag_ids[min(int(rng.paretovariate(1.2)) - 1, len(tag_ids) - 1)] for _ in range(k)}
+        links.extend({'note_id': row['id'], 'tag_id': tag_id} for tag_id in chosen)
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=1000, help="number of notes to add")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', help="database file (default: NOTES_DB_PATH or notes.db)")
+    parser.add_argument('--tags', type=int, default=20, help="number of distinct tags")
+    parser.add_argument('--clusters', type=int, default=30, help="number of note clusters on the canvas")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per bulk insert")
+    parser.add_argument('--replace', action='store_true', help="delete existing notes and tags first")
+    args = parser.parse_args()
+
+    from database import Database
+
+    db = Database(args.db)
+    try:
+        start = time.perf_counter()
+        generate_board(db.engine, args.notes, seed=args.seed, tags=args.tags, clusters=args.clusters,
+                       chunk_size=args.chunk_size, replace=args.replace)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(f"Added {args.notes} notes to {db.path} in {elapsed:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+"""Export notes to, and import them from, JSON Lines files or Markdown folders.
+
+- JSON Lines (``.jsonl``): a header line with the format version and the tag
+  colors, then one JSON object per note
+- Markdown folder: one ``.md`` file per note, with the note's fields as front
+  matter (``key: <JSON value>`` lines between ``---`` lines) followed by the
+  content as is, plus ``tags.json`` with the tag colors. Markdown files
+  without front matter are imported as notes titled after the file.
+
+Geometry, color, text size, pinned/archived flags, tags and timestamps round
+trip. Export streams rows from the database cursor. Import reads one note at a
+time and inserts them in chunks, resolving a chunk's tags with one query, so
+memory depends on the chunk size rather than the size of the dump. An import
+is one transaction, so a failed import leaves the database as it was. Note ids
+are kept unless already taken.
+
+Usage: python src/import_export.py export notes.jsonl [--db notes.db]
+       python src/import_export.py import notes.jsonl [--db notes.db] [--chunk-size 1000]
+       python src/import_export.py export notes/ --format markdown
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+import search_index
+import spatial_index
+from models import Note, Tag, note_tags, PREVIEW_LENGTH
+from theme import DEFAULT_NOTE_COLOR
+
+FORMAT_NAME = 'notes-jsonl'
+FORMAT_VERSION = 1
+FORMATS = ('jsonl', 'markdown')
+TAGS_FILE = 'tags.json'  # Tag colors in a Markdown folder
+
+# Exported note fields besides id and tags, with the values missing ones import as
+DEFAULTS = {
+    'title': "",
+    'content': "",
+    'color': DEFAULT_NOTE_COLOR,
+    'text_size': 14,
+    'position_x': None,
+    'position_y': None,
+    'width': 300,
+    'height': 200,
+    'is_pinned': False,
+    'is_archived': False,
+    'created_at': None,  # Missing timestamps become the import time
+    'updated_at': None,
+}
+TIMESTAMPS = ('created_at', 'updated_at')
+DEFAULT_TAG_COLOR = "#e0e0e0"
+CHUNK_SIZE = 1000  # Notes per insert or fetch
+CHUNK_BYTES = 8 * 1024 * 1024  # Fewer notes per insert once their content adds up to this
+
+# progress(notes, done, total): notes handled so far, and how far through the
+# source that is, in rows for an export, bytes for a JSON Lines import and
+# files for a Markdown import
+Progress = Callable[[int, int, int], None]
+
+
+def _records(connection, chunk_size: int) -> Iterator[dict]:
+    # Each note's tag names come from a correlated subquery on the
+    # (note_id, tag_id) index, so the notes stream in one pass
+    tag_names = (select(func.json_group_array(Tag.name))
+                 .select_from(note_tags.join(Tag, Tag.id == note_tags.c.tag_id))
+                 .where(note_tags.c.note_id == Note.id)
+                 .scalar_subquery())
+    query = (select(Note.id, *(getattr(Note, field) for field in DEFAULTS), tag_names.label('tags'))
+             .order_by(Note.id))
+    # pysqlite steps the cursor as rows are fetched; yield_per keeps SQLAlchemy
+    # from buffering more than a chunk of them
+    result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+    for row in result:
+        record = dict(row._mapping)
+        record['tags'] = sorted(json.loads(record['tags']))
+        for field in TIMESTAMPS:
+            if record[field] is not None:
+                record[field] = record[field].isoformat()
+        yield record
+
+
+def export_jsonl(engine, path: str, progress: Optional[Progress] = None,
+                 chunk_size: int = CHUNK_SIZE) -> int:
+    """Write every note to a JSON Lines file and return the number written."""
+    count = 0
+    with engine.connect() as connection, open(path, 'w', encoding='utf-8', newline='\n') as output:
+        total = connection.execute(select(func.count(Note.id))).scalar()
+        tag_colors = dict(connection.execute(select(Tag.name, Tag.color)).all())
+        output.write(json.dumps({'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'tags': tag_colors},
+                                ensure_ascii=False) + "\n")
+        for record in _records(connection, chunk_size):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+            if progress and count % chunk_size == 0:
+                progress(count, count, total)
+    if progress:
+        progress(count, count, count)
+    return count
+
+
+def _file_name(record: dict) -> str:
+    label = record['title'] or record['content'].split("\n", 1)[0]
+    slug = re.sub(r'[^\w]+', '-', label.lower())[:40].strip('-')
+    return f"{record['id']}-{slug}.md" if slug else f"{record['id']}.md"
+
+
+def export_markdown(engine, folder: str, progress: Optional[Progress] = None,
+                    chunk_size: int = CHUNK_SIZE) -> int:
+    """Write every note to a Markdown file in ``folder`` and return the number written."""
+    os.makedirs(folder, exist_ok=True)
+    count = 0
+    with engine.connect() as connection:
+        total = connection.execute(select(func.count(Note.id))).scalar()
+        tag_colors = dict(connection.execute(select(Tag.name, Tag.color)).all())
+        with open(os.path.join(folder, TAGS_FILE), 'w', encoding='utf-8') as output:
+            json.dump(tag_colors, output, ensure_ascii=False, indent=2)
+        for record in _records(connection, chunk_size):
+            record['content'] = record['content'] or ""
+            lines = ["---"]
+            lines.extend(f"{key}: {json.dumps(value, ensure_ascii=False)}"
+                         for key, value in record.items() if key != 'content')
+            lines.append("---")
+            with open(os.path.join(folder, _file_name(record)), 'w', encoding='utf-8', newline='') as output:
+                output.write("\n".join(lines) + "\n" + record['content'])
+            count += 1
+            if progress and count % chunk_size == 0:
+                progress(count, count, total)
+    if progress:
+        progress(count, count, count)
+    return count
+
+
+def _parse_markdown(text: str, file_name: str) -> dict:
+    if text.startswith("---\n"):
+        end = text.find("\n---\n", 3)
+        if end != -1:
+            record = {}
+            for line in text[4:end].split("\n"):
+                key, separator, value = line.partition(":")
+                if not separator:
+                    continue
+                value = value.strip()
+                try:
+                    record[key.strip()] = json.loads(value)
+                except ValueError:
+                    record[key.strip()] = value  # Hand-written front matter, e.g. title: Plain text
+            record['content'] = text[end + 5:]
+            return record
+    return {'title': os.path.splitext(file_name)[0], 'content': text}
+
+
+def _parse_timestamp(value, now: datetime) -> datetime:
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value)
+    return now
+
+
+def _note_row(record: dict, note_id: int, now: datetime) -> dict:
+    row = {'id': note_id}
+    for field, default in DEFAULTS.items():
+        value = record.get(field)
+        row[field] = default if value is None else value
+    for field in TIMESTAMPS:
+        row[field] = _parse_timestamp(record.get(field), now)
+    row['content'] = str(row['content'])
+    row['preview'] = row['content'][:PREVIEW_LENGTH]  # Saves the preview trigger a write per row
+    return row
+
+
+def _resolve_tags(connection, names: Iterable[str], tag_ids: Dict[str, int], tag_colors: Dict[str, str]):
+    # Adds the ids of the given tags to tag_ids, creating the missing ones
+    names = set(names) - tag_ids.keys()
+    if not names:
+        return
+    existing = dict(connection.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    missing = [{'name': name, 'color': tag_colors.get(name, DEFAULT_TAG_COLOR)}
+               for name in names if name not in existing]
+    if missing:
+        connection.execute(insert(Tag), missing)
+        existing = dict(connection.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    tag_ids.update(existing)
+
+
+def _insert_chunk(connection, records: List[dict], next_id: int, tag_ids: Dict[str, int],
+                  tag_colors: Dict[str, str], indexers: Iterable[Callable[[List[int]], None]]) -> int:
+    # Returns the next free id. Ids already in the database, or used earlier in
+    # the chunk, are replaced with new ones above every id seen so far.
+    wanted = [record.get('id') for record in records if type(record.get('id')) is int]
+    taken = set(connection.scalars(select(Note.id).where(Note.id.in_(wanted)))) if wanted else set()
+    now = datetime.utcnow()
+    rows, tags = [], []
+    for record in records:
+        note_id = record.get('id')
+        if type(note_id) is not int or note_id <= 0 or note_id in taken:
+            note_id = next_id
+        taken.add(note_id)
+        next_id = max(next_id, note_id + 1)
+        rows.append(_note_row(record, note_id, now))
+        tags.append((note_id, list(dict.fromkeys(str(name) for name in record.get('tags') or ()))))
+
+    _resolve_tags(connection, (name for _, names in tags for name in names), tag_ids, tag_colors)
+    connection.execute(insert(Note), rows)
+    for index in indexers:
+        index([row['id'] for row in rows])
+    links = [{'note_id': note_id, 'tag_id': tag_ids[name]} for note_id, names in tags for name in names]
+    if links:
+        connection.execute(insert(note_tags), links)
+    return next_id
+
+
+def _import(engine, records: Iterator[Tuple[dict, int]], tag_colors: Dict[str, str], total: int,
+            progress: Optional[Progress], chunk_size: int) -> int:
+    count = 0
+    with engine.begin() as connection:
+        # pysqlite only opens a transaction before DML, so the trigger changes
+        # bulk_insert makes first would otherwise commit on their own and
+        # survive a rollback. IMMEDIATE takes the write lock up front.
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        next_id = (connection.execute(select(func.max(Note.id))).scalar() or 0) + 1
+        tag_ids = {}  # Grows with the distinct tags, not the notes
+        _resolve_tags(connection, tag_colors, tag_ids, tag_colors)  # Including tags no note uses
+        # Indexing each chunk with one statement beats running the index triggers per row
+        with search_index.bulk_insert(connection) as index_text, \
+                spatial_index.bulk_insert(connection) as index_boxes:
+            indexers = (index_text, index_boxes)
+            chunk, chunk_bytes, done = [], 0, 0
+            for record, done in records:
+                chunk.append(record)
+                chunk_bytes += len(record.get('content') or "")
+                if len(chunk) < chunk_size and chunk_bytes < CHUNK_BYTES:
+                    continue
+                next_id = _insert_chunk(connection, chunk, next_id, tag_ids, tag_colors, indexers)
+                count += len(chunk)
+                chunk, chunk_bytes = [], 0
+                if progress:
+                    progress(count, done, total)
+            if chunk:
+                _insert_chunk(connection, chunk, next_id, tag_ids, tag_colors, indexers)
+                count += len(chunk)
+    if progress:
+        progress(count, total, total)
+    return count
+
+
+def import_jsonl(engine, path: str, progress: Optional[Progress] = None,
+                 chunk_size: int = CHUNK_SIZE) -> int:
+    """Add the notes in a JSON Lines file and return the number added."""
+    def parse(line, number):
+        try:
+            return json.loads(line)
+        except ValueError as error:
+            raise ValueError(f"{path}, line {number}: {error}") from None
+
+    def records(source, done, number):
+        for number, line in enumerate(source, number + 1):
+            done += len(line)
+            if line.strip():
+                yield parse(line, number), done
+
+    with open(path, 'rb') as source:
+        # The header is optional, so hand-written files of note objects import too
+        first = source.readline()
+        header = parse(first, 1) if first.strip() else {}
+        tag_colors = {}
+        if 'format' in header:
+            if header['format'] != FORMAT_NAME or header.get('version', 0) > FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported format {header['format']!r} version {header.get('version')}")
+            tag_colors = header.get('tags') or {}
+            notes = records(source, len(first), 1)
+        else:
+            source.seek(0)
+            notes = records(source, 0, 0)
+        return _import(engine, notes, tag_colors, os.path.getsize(path), progress, chunk_size)
+
+
+def import_markdown(engine, folder: str, progress: Optional[Progress] = None,
+                    chunk_size: int = CHUNK_SIZE) -> int:
+    """Add a note for every ``.md`` file in ``folder`` and return the number added."""
+    tag_colors = {}
+    tags_path = os.path.join(folder, TAGS_FILE)
+    if os.path.exists(tags_path):
+        with open(tags_path, encoding='utf-8') as source:
+            tag_colors = json.load(source)
+
+    def is_note(entry):
+        return entry.is_file() and entry.name.lower().endswith('.md')
+
+    with os.scandir(folder) as entries:
+        total = sum(1 for entry in entries if is_note(entry))
+
+    def records():
+        done = 0
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not is_note(entry):
+                    continue
+                with open(entry.path, encoding='utf-8', newline='') as source:
+                    text = source.read()
+                done += 1
+                yield _parse_markdown(text, entry.name), done
+
+    return _import(engine, records(), tag_colors, total, progress, chunk_size)
+
+
+def _format_for(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.json')) else 'markdown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=('export', 'import'))
+    parser.add_argument('path', help="JSON Lines file or Markdown folder")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="default: jsonl for .jsonl/.json paths, markdown otherwise")
+    parser.add_argument('--db', help="database file (default: NOTES_DB_PATH or notes.db)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="notes per insert or fetch")
+    args = parser.parse_args()
+
+    from database import Database
+
+    def report(notes, done, total):
+        percent = f" ({done / total:.0%})" if total else ""
+        print(f"\r{notes} notes{percent}", end="", file=sys.stderr, flush=True)
+
+    operations = {
+        ('export', 'jsonl'): export_jsonl,
+        ('export', 'markdown'): export_markdown,
+        ('import', 'jsonl'): import_jsonl,
+        ('import', 'markdown'): import_markdown,
+    }
+    operation = operations[args.command, _format_for(args.path, args.format)]
+    db = Database(args.db)
+    try:
+        start = time.perf_counter()
+        count = operation(db.engine, args.path, report, args.chunk_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(file=sys.stderr)
+    verb = "Exported" if args.command == 'export' else "Imported"
+    print(f"{verb} {count} notes {'to' if args.command == 'export' else 'from'} {args.path} in {elapsed:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Counters and timing histograms for the application's hot paths.
+
+Instrumentation is switched on with ``NOTES_INSTRUMENT=1``. When it is off,
+``instrument`` leaves functions untouched, ``timed`` hands out one shared no-op
+context manager and ``count`` returns straight away, so instrumented code
+costs a flag check at most. Collected data can be shown in the board's
+performance overlay (F12) and is written to ``NOTES_INSTRUMENT_FILE``
+(default ``instrumentation.json``) when the app exits.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Read before anything is decorated, so a .env file can switch it on too
+load_dotenv()
+enabled = os.getenv('NOTES_INSTRUMENT', '') not in ('', '0')
+DUMP_PATH = os.getenv('NOTES_INSTRUMENT_FILE', 'instrumentation.json')
+
+# Upper bucket bounds in milliseconds; anything slower lands in the last bucket
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 16, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds."""
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, ms: float):
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimate a percentile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                # The bucket bound can overshoot the largest sample
+                return min(BUCKETS_MS[index], self.max) if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets': dict(zip([str(bound) for bound in BUCKETS_MS] + ['inf'], self.buckets)),
+        }
+
+
+_lock = threading.Lock()  # The autosave worker records from its own thread
+_counters = {}
+_histograms = {}
+
+
+def count(name: str, amount: int = 1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def record(name: str, ms: float):
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.record(ms)
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(name: str):
+    """Context manager recording the block's duration in the ``name`` histogram."""
+    return _Timer(name) if enabled else _NULL_TIMER
+
+
+def instrument(name: str):
+    """Decorator timing every call of a function; a no-op when disabled at import."""
+    def decorator(func):
+        if not enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def install_database(engine, session_factory):
+    """Count queries and time them and session commits for an engine."""
+    if not enabled:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['instrumentation_start'].pop()
+        count('db.queries')
+        record('db.query', (time.perf_counter() - start) * 1000)
+
+    # Session-level commits include the flush, which is what callers wait for
+    @event.listens_for(session_factory, 'before_commit')
+    def before_commit(session):
+        session.info['instrumentation_commit'] = time.perf_counter()
+
+    @event.listens_for(session_factory, 'after_commit')
+    def after_commit(session):
+        start = session.info.pop('instrumentation_commit', None)
+        if start is not None:
+            count('db.commits')
+            record('db.commit', (time.perf_counter() - start) * 1000)
+
+
+def snapshot() -> dict:
+    """Return the counters and histograms collected so far."""
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'histograms': {name: histogram.to_dict() for name, histogram in _histograms.items()},
+        }
+
+
+def summary_lines(limit: int = 20):
+    """Short human-readable lines for the overlay, slowest totals first."""
+    with _lock:
+        histograms = sorted(_histograms.items(), key=lambda item: item[1].total, reverse=True)
+        counters = sorted(_counters.items())
+        lines = [f"{name:<26}{hist.count:>7} {hist.percentile(0.5):>7.2f} {hist.percentile(0.95):>7.2f} "
+                 f"{hist.max:>8.1f}" for name, hist in histograms[:limit]]
+    header = f"{'timing (ms)':<26}{'n':>7} {'p50':>7} {'p95':>7} {'max':>8}"
+    return [header] + lines + [f"{name}: {value}" for name, value in counters]
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def dump(path: str = None):
+    """Write the collected data to a JSON file (only when enabled)."""
+    if not enabled:
+        return
+    data = snapshot()
+    data['written'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path or DUMP_PATH, 'w') as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,233 @@
+"""Packing strategies for "Arrange Notes".
+
+Notes are packed by their actual size into a band roughly matching the
+viewport's aspect ratio:
+
+- ``skyline``: each note goes into the lowest gap of the current skyline
+  (bottom-left), so short notes fill in next to tall ones
+- ``shelf``: notes fill rows left to right; a row is as tall as its
+  tallest note
+- ``grid``: uniform cells as large as the largest note
+
+Notes can first be grouped by tag or color; every group is packed on its own
+and the groups are then laid out as blocks. Within a group notes are ordered
+by size (best packing), last edit or current position (reading order).
+Everything is a sort plus a linear or heap-driven pass, O(n log n) overall.
+"""
+import heapq
+import itertools
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+STRATEGIES = ('skyline', 'shelf', 'grid')
+GROUPINGS = (None, 'tag', 'color')
+ORDERS = ('size', 'updated', 'position')
+
+Positions = Dict[int, Tuple[float, float]]
+
+
+class LayoutItem(NamedTuple):
+    note_id: int
+    width: float
+    height: float
+    x: float = 0.0  # Current position, for the 'position' order
+    y: float = 0.0
+    color: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    updated_at: Optional[object] = None  # Anything comparable, e.g. a datetime
+
+
+class _Segment:
+    """Horizontal piece of the skyline, linked to its neighbours."""
+    __slots__ = ('x', 'width', 'y', 'prev', 'next', 'alive')
+
+    def __init__(self, x, width, y):
+        self.x = x
+        self.width = width
+        self.y = y
+        self.prev = None
+        self.next = None
+        self.alive = True
+
+
+def _skyline(sizes: Sequence[Tuple[int, float, float]], width: float) -> Tuple[Positions, float]:
+    # The lowest segment comes from a heap; the segments a note covers are
+    # replaced by its top edge, so each segment is created and removed once
+    heappush, heappop = heapq.heappush, heapq.heappop
+    counter = itertools.count(1)
+    heap = [(0.0, 0.0, 0, _Segment(0.0, width, 0.0))]
+    positions = {}
+    height = 0.0
+    for note_id, w, h in sizes:
+        lowest = heappop(heap)[3]
+        while not lowest.alive:
+            lowest = heappop(heap)[3]
+        x = lowest.x
+        if x + w > width:
+            x = width - w if width > w else 0.0
+        end = x + w
+
+        first = lowest
+        while first.x > x:
+            first = first.prev
+        last, top = first, first.y
+        following = last.next
+        while following is not None and following.x < end:
+            last = following
+            if last.y > top:
+                top = last.y
+            following = last.next
+        positions[note_id] = (x, top)
+        if top + h > height:
+            height = top + h
+
+        # The note's top edge replaces what it covers. The first and last covered
+        # segments shrink to their uncovered ends, if any, which keeps their heap
+        # entries valid (the key's x only breaks ties).
+        segment = _Segment(x, w, top + h)
+        keep_left = first.x < x
+        keep_right = last.x + last.width > end
+        if first is last and keep_left and keep_right:
+            # The note sits inside a single segment, which splits in two
+            following = _Segment(end, last.x + last.width - end, last.y)
+            following.next = last.next
+            if last.next is not None:
+                last.next.prev = following
+            heappush(heap, (following.y, end, next(counter), following))
+            first.width = x - first.x
+            before = first
+        else:
+            start = first.next if keep_left else first
+            before = first if keep_left else first.prev
+            if keep_left:
+                first.width = x - first.x
+            if keep_right:
+                last.width = last.x + last.width - end
+                last.x = end
+            following = last if keep_right else last.next
+            node = start
+            while node is not following:
+                node.alive = False
+                node = node.next
+        if lowest.alive:
+            # Popped above but only partly covered
+            heappush(heap, (lowest.y, lowest.x, next(counter), lowest))
+
+        # A level neighbour merges into the new segment
+        if before is not None and before.y == segment.y:
+            before.alive = False
+            segment.x, segment.width = before.x, segment.width + before.width
+            before = before.prev
+        if following is not None and following.y == segment.y:
+            following.alive = False
+            segment.width += following.width
+            following = following.next
+        segment.prev, segment.next = before, following
+        if before is not None:
+            before.next = segment
+        if following is not None:
+            following.prev = segment
+        heappush(heap, (segment.y, segment.x, next(counter), segment))
+    return positions, height
+
+
+def _shelf(sizes: Sequence[Tuple[int, float, float]], width: float) -> Tuple[Positions, float]:
+    positions = {}
+    x = y = shelf_height = 0.0
+    for note_id, w, h in sizes:
+        if x > 0 and x + w > width:
+            y += shelf_height
+            x = shelf_height = 0.0
+        positions[note_id] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def _grid(sizes: Sequence[Tuple[int, float, float]], width: float) -> Tuple[Positions, float]:
+    cell_width = max(w for _, w, _ in sizes)
+    cell_height = max(h for _, _, h in sizes)
+    columns = max(1, int(width // cell_width))
+    positions = {note_id: ((index % columns) * cell_width, (index // columns) * cell_height)
+                 for index, (note_id, _, _) in enumerate(sizes)}
+    return positions, math.ceil(len(sizes) / columns) * cell_height
+
+
+_PACKERS = {'skyline': _skyline, 'shelf': _shelf, 'grid': _grid}
+
+
+def _order(items: Sequence[LayoutItem], sort_by: str) -> List[LayoutItem]:
+    if sort_by == 'size':
+        return sorted(items, key=lambda item: (-item.height, -item.width, item.note_id))
+    if sort_by == 'position':
+        return sorted(items, key=lambda item: (item.y, item.x, item.note_id))
+    if sort_by == 'updated':
+        # Newest first, notes without a timestamp last. Timestamps can't be
+        # negated, so this relies on reverse sorts being stable too.
+        ordered = sorted(items, key=lambda item: item.note_id)
+        dated = sorted((item for item in ordered if item.updated_at is not None),
+                       key=lambda item: item.updated_at, reverse=True)
+        return dated + [item for item in ordered if item.updated_at is None]
+    raise ValueError(f"Unknown order {sort_by!r}, expected one of {ORDERS}")
+
+
+def _group_key(group_by: Optional[str]):
+    # Returns (is_ungrouped, key) so notes without a tag or color come last
+    if group_by is None:
+        return lambda item: (False, "")
+    if group_by == 'tag':
+        return lambda item: (not item.tags, min(item.tags) if item.tags else "")
+    if group_by == 'color':
+        return lambda item: (not item.color, (item.color or "").lower())
+    raise ValueError(f"Unknown grouping {group_by!r}, expected one of {GROUPINGS}")
+
+
+def _pack(items: List[LayoutItem], strategy: str, spacing: float,
+          aspect: float) -> Tuple[Positions, float, float]:
+    # Sizes include the gap to the right and below, which is trimmed off the bounds
+    sizes = [(item.note_id, item.width + spacing, item.height + spacing) for item in items]
+    area = sum(w * h for _, w, h in sizes)
+    width = max(max(w for _, w, _ in sizes), math.sqrt(area * aspect))
+    positions, height = _PACKERS[strategy](sizes, width)
+    used_width = max(positions[note_id][0] + w for note_id, w, _ in sizes)
+    return positions, used_width - spacing, height - spacing
+
+
+def arrange(items: Sequence[LayoutItem], strategy: str = 'skyline', group_by: Optional[str] = None,
+            sort_by: str = 'size', spacing: float = 20, group_spacing: float = 100,
+            aspect: float = 1.6) -> Tuple[Positions, float, float]:
+    """Lay the items out and return ``(positions, width, height)``.
+
+    ``positions`` maps note ids to top-left corners relative to the layout's
+    top-left corner; ``width`` and ``height`` are the layout's bounds. ``aspect``
+    is the width:height ratio the layout should roughly have.
+    """
+    if strategy not in _PACKERS:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    if not items:
+        return {}, 0.0, 0.0
+
+    group_key = _group_key(group_by)
+    ordered = _order(items, sort_by)
+    groups = {}
+    for item in ordered:  # Sorting is stable, so groups keep the order
+        groups.setdefault(group_key(item), []).append(item)
+    if len(groups) == 1:
+        return _pack(ordered, strategy, spacing, aspect)
+
+    # Each group becomes a block; blocks are shelved in group order
+    blocks = [(key, _pack(members, strategy, spacing, aspect)) for key, members in sorted(groups.items())]
+    block_sizes = [(index, width + group_spacing, height + group_spacing)
+                   for index, (_, (_, width, height)) in enumerate(blocks)]
+    area = sum(w * h for _, w, h in block_sizes)
+    band = max(max(w for _, w, _ in block_sizes), math.sqrt(area * aspect))
+    offsets, total_height = _shelf(block_sizes, band)
+
+    positions = {}
+    total_width = 0.0
+    for index, (_, (block, width, _)) in enumerate(blocks):
+        ox, oy = offsets[index]
+        total_width = max(total_width, ox + width)
+        for note_id, (x, y) in block.items():
+            positions[note_id] = (ox + x, oy + y)
+    return positions, total_width, total_height - group_spacing
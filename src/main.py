@@ -1,24 +1,53 @@
+import time
+_PROCESS_START = time.perf_counter()  # Reference point for --profile-startup
+
+import argparse
+import math
 import sys
+from typing import TYPE_CHECKING
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QHBoxLayout, QPushButton, QLineEdit, QLabel, QMessageBox)
-from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, QSizeF
-from PyQt6.QtGui import QIcon, QFont
-from database import Database
-from note_widget import NoteWidget
-from note_operations import NoteOperations
+                           QHBoxLayout, QPushButton, QLineEdit, QLabel, QMessageBox, QMenu)
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, QSizeF, QObject, pyqtSignal
+from PyQt6.QtGui import QIcon, QFont, QKeySequence, QShortcut, QActionGroup
 from board_widget import BoardView
-from models import Note
+import layout_engine
+from undo_stack import UndoStack, GeometryCommand, FieldsCommand, DeleteNotesCommand
+import instrumentation
+import theme
+
+# SQLAlchemy and the note widgets are imported once the window has painted,
+# see MainWindow.open_database and MainWindow.create_note_widget
+if TYPE_CHECKING:
+    from models import Note
+
+VIRTUALIZE_THRESHOLD = 200  # Boards with at least this many notes only build widgets near the viewport
+LOAD_BATCH_SIZE = 50  # Note widgets built per event loop turn while loading
+PLACEHOLDER_BATCH_SIZE = 1000  # Placeholders are cheap, so virtualized boards load in larger steps
 
 class MainWindow(QMainWindow):
+    first_painted = pyqtSignal()
+    notes_loaded = pyqtSignal(int)  # Emitted with the note count once every note is on the board
+    
     def __init__(self):
         super().__init__()
-        self.db = Database()
-        self.session = self.db.get_session()
-        self.note_ops = NoteOperations(self.session)
+        # Storage is opened after the first paint, see start()
+        self.db = None
+        self.session = None
+        self.tracker = None
+        self.note_ops = None
+        self.autosave = None
+        self._started = False
+        self._first_paint_seen = False
+        self._load_queue = []  # Notes still to be added to the board, nearest last
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self.perform_search)
         self.note_proxies = {}  # Store note proxies for position tracking
+        self.hidden_note_ids = set()  # Notes hidden by the current search
+        self.undo_stack = UndoStack(self)  # Board operations; text edits have the note's own undo
+        self.arrange_strategy = 'skyline'  # Arrange Notes options, see layout_engine
+        self.arrange_group_by = None
+        self.arrange_sort_by = 'size'
         self.initUI()
         
     def initUI(self):
@@ -40,6 +69,8 @@ class MainWindow(QMainWindow):
         toolbar_container = QWidget()
         toolbar_container.setObjectName("toolbarContainer")
         toolbar_container.setLayout(toolbar)
+        toolbar_container.setEnabled(False)  # Until the database is open
+        self.toolbar_container = toolbar_container
         
         # Left side container
         left_container = QHBoxLayout()
@@ -92,6 +123,13 @@ class MainWindow(QMainWindow):
         reset_zoom_button.clicked.connect(self.reset_zoom)
         left_container.addWidget(reset_zoom_button)
         
+        # Zoom to fit button
+        fit_button = QPushButton("Fit All")
+        fit_button.setMinimumHeight(40)
+        fit_button.setToolTip("Zoom to fit all notes (Ctrl+0)")
+        fit_button.clicked.connect(self.zoom_to_fit)
+        left_container.addWidget(fit_button)
+        
         # Add organize buttons
         organize_container = QHBoxLayout()
         organize_container.setSpacing(5)
@@ -108,6 +146,19 @@ class MainWindow(QMainWindow):
         arrange_button.clicked.connect(self.arrange_notes)
         organize_container.addWidget(arrange_button)
         
+        # Arrange options: layout strategy, grouping and order
+        arrange_options_button = QPushButton()
+        arrange_options_button.setMinimumHeight(40)
+        arrange_options_button.setFixedWidth(40)
+        arrange_options_button.setToolTip("Arrange options")
+        arrange_options_button.setMenu(self.create_arrange_menu())
+        organize_container.addWidget(arrange_options_button)
+        
+        # Organizing a partly loaded board would leave the late notes behind
+        self.organize_buttons = [snap_grid_button, arrange_button, arrange_options_button]
+        for button in self.organize_buttons:
+            button.setEnabled(False)
+        
         left_container.addLayout(organize_container)
         
         # Add left container to toolbar
@@ -135,6 +186,27 @@ class MainWindow(QMainWindow):
         
         # Connect zoom signal
         self.board.zoom_changed.connect(self.update_zoom_label)
+        self.board.note_item_changed.connect(self.on_note_item_changed)
+        self.board.note_geometry_committed.connect(self.on_note_geometry_committed)
+        
+        # Performance overlay
+        self.overlay_shortcut = QShortcut(QKeySequence("F12"), self)
+        self.overlay_shortcut.activated.connect(self.board.performance_overlay.toggle)
+        
+        # Minimap
+        self.minimap_shortcut = QShortcut(QKeySequence("Ctrl+M"), self)
+        self.minimap_shortcut.activated.connect(
+            lambda: self.board.minimap.setVisible(not self.board.minimap.isVisible()))
+        
+        # Zoom to fit
+        self.fit_shortcut = QShortcut(QKeySequence("Ctrl+0"), self)
+        self.fit_shortcut.activated.connect(self.zoom_to_fit)
+        
+        # Undo/redo, unless a focused note editor takes the keys for its text
+        self.undo_shortcut = QShortcut(QKeySequence("Ctrl+Z"), self)
+        self.undo_shortcut.activated.connect(self.undo)
+        self.redo_shortcut = QShortcut(QKeySequence("Ctrl+Shift+Z"), self)
+        self.redo_shortcut.activated.connect(self.redo)
         
         # Set dark theme style
         self.setStyleSheet("""
@@ -186,226 +258,532 @@ class MainWindow(QMainWindow):
             }
         """)
         
-        self.load_notes()
-        
         # Add help text
         help_text = QLabel(
             "Controls: Alt+Left Click or Middle Click to pan • Ctrl+Scroll to zoom • "
+            "Ctrl+0 to fit all notes • Ctrl+M to toggle the minimap • "
             "Drag notes to move them • Drag note edges to resize • "
             "Ctrl++ / Ctrl+- to adjust note text size • "
-            "Ctrl+R to insert separator"
+            "Ctrl+R to insert separator • Ctrl+Z / Ctrl+Shift+Z to undo / redo board changes • "
+            "F12 for performance stats"
         )
         help_text.setStyleSheet("color: #888888; font-size: 12px;")
+        help_text.setWordWrap(True)
         layout.addWidget(help_text)
     
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # start() only runs once the event loop gets to it, so don't count on _started
+        if not self._first_paint_seen:
+            self._first_paint_seen = True
+            self.first_painted.emit()
+            QTimer.singleShot(0, self.start)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        # In case the window is shown without ever being painted (e.g. minimized)
+        QTimer.singleShot(200, self.start)
+    
+    def start(self):
+        """Open the database and start loading notes (runs once, after the first paint)."""
+        if self._started:
+            return
+        self._started = True
+        self.open_database()
+        self.toolbar_container.setEnabled(True)
+        self.load_notes()
+    
+    def open_database(self):
+        from database import Database
+        from note_operations import NoteOperations
+        from autosave import AutosaveQueue
+        from change_tracker import ChangeTracker
+        
+        self.db = Database()
+        self.session = self.db.get_session()
+        self.tracker = ChangeTracker()  # Last persisted state, shared by every writer
+        self.note_ops = NoteOperations(self.session, self.tracker)
+        self.autosave = AutosaveQueue(self.db.create_session, window_ms=500, tracker=self.tracker)
+        self.autosave.flushed.connect(self.on_autosave_flushed)
+    
     def load_notes(self):
+        """Load the board, adding notes in batches from the event loop.
+        
+        The saved viewport is restored first and the notes nearest its center
+        are added first, so what the user looks at fills in before the rest.
+        """
+        self._load_started = time.perf_counter()
+        
         # Clear existing notes
-        self.board.scene.clear()
-        self.board.draw_grid()
+        self.board.clear_notes()
         self.note_proxies.clear()
+        self.hidden_note_ids.clear()
+        self.undo_stack.clear()
         
-        # Load notes from database
-        notes = self.note_ops.get_all_notes()
+        # Load what's needed to place the notes; content is fetched per batch or on demand
+        notes = self.note_ops.get_note_metadata()
+        virtualize = len(notes) >= VIRTUALIZE_THRESHOLD
+        self.board.set_virtualized(virtualize, self.materialize_note if virtualize else None)
         for note in notes:
-            self.add_note_widget(note)
+            self.tracker.remember(note)
         
         # Restore viewport state
         viewport_state = self.note_ops.get_viewport_state()
         self.board.restore_viewport_state(viewport_state)
+        
+        center = self.board.mapToScene(self.board.viewport().rect().center())
+        def distance(note):
+            if note.position_x is None:
+                return math.inf
+            return math.hypot(note.position_x - center.x(), note.position_y - center.y())
+        self._load_queue = sorted(notes, key=distance, reverse=True)
+        QTimer.singleShot(0, self._load_next_batch)
     
-    def add_note_widget(self, note: Note = None):
-        if note is None:
-            # Create new note in database
-            note = self.note_ops.create_note("", "", "#2d2d2d")
+    @instrumentation.instrument('window.load_batch')
+    def _load_next_batch(self):
+        batch_size = PLACEHOLDER_BATCH_SIZE if self.board.virtualized else LOAD_BATCH_SIZE
+        batch = [self._load_queue.pop() for _ in range(min(batch_size, len(self._load_queue)))]
+        if self.board.virtualized:
+            for note in batch:
+                self.add_note_placeholder(note)
+        else:
+            contents = self.note_ops.get_note_contents(note.id for note in batch)
+            for note in batch:
+                self.add_note_widget(note, contents.get(note.id, ""))
+        
+        if self._load_queue:
+            QTimer.singleShot(0, self._load_next_batch)
+            return
+        
+        # Filter the late arrivals if a search was typed while loading
+        if self.search_bar.text().strip():
+            self.perform_search()
+        self.board.schedule_virtualization()
+        for button in self.organize_buttons:
+            button.setEnabled(True)
+        instrumentation.record('window.load_notes', (time.perf_counter() - self._load_started) * 1000)
+        self.notes_loaded.emit(len(self.note_proxies))
+    
+    def create_note_widget(self, note_id, content, color, text_size):
+        from note_widget import NoteWidget
         
-        # Create note widget
         note_widget = NoteWidget(
-            note_id=note.id,
-            title=note.title,
-            content=note.content,
-            color=note.color,
-            text_size=note.text_size
+            note_id=note_id,
+            content=content,
+            color=color,
+            text_size=text_size
         )
         note_widget.updated.connect(self.update_note)
         note_widget.deleted.connect(self.delete_note)
+        note_widget.property_changed.connect(self.on_note_property_changed)
+        return note_widget
+    
+    def add_note_widget(self, note: 'Note' = None, content=None):
+        """Add a widget for a note or metadata row, passing ``content`` if the row lacks it."""
+        if note is None:
+            # Create new note in database
+            note = self.note_ops.create_note("", "", "#2d2d2d")
+        if content is None:
+            content = note.content
+        
+        # Create note widget
+        note_widget = self.create_note_widget(note.id, content, note.color, note.text_size)
         
         # Add to board
         pos = QPointF(note.position_x, note.position_y) if note.position_x is not None else None
-        proxy = self.board.add_note(note_widget, pos)
-        
         # Set size if it exists in the database
-        if hasattr(note, 'width') and hasattr(note, 'height'):
-            proxy.setGeometry(QRectF(proxy.geometry().topLeft(), 
-                                   QSizeF(note.width, note.height)))
+        size = QSizeF(note.width, note.height) if hasattr(note, 'width') and hasattr(note, 'height') else None
+        proxy = self.board.add_note(note_widget, pos, size)
         
         self.note_proxies[note.id] = proxy
         
         # Apply current search highlighting if exists
-        if self.search_bar.text().strip():
-            note_widget.highlight_search(self.search_bar.text().strip())
+        self.apply_search_highlight(note_widget)
+        
+        return note_widget
+    
+    def add_note_placeholder(self, note: 'Note'):
+        """Add a note to a virtualized board without building its widget."""
+        if note.position_x is not None:
+            pos = QPointF(note.position_x, note.position_y)
+        else:
+            pos = self.board.mapToScene(self.board.viewport().rect().center())
+        rect = QRectF(pos, QSizeF(note.width or 300, note.height or 200))
+        self.note_proxies[note.id] = self.board.add_placeholder(note.id, rect, note.color, note.preview)
+    
+    def materialize_note(self, note_id, note_widget=None):
+        """Build a widget for a note entering the viewport, reusing a pooled one if given."""
+        from models import Note
+        
+        note = self.session.get(Note, note_id)
+        if note is None:
+            return None
+        
+        # Edits still queued for autosave are newer than the database row
+        fields = {'content': note.content, 'color': note.color, 'text_size': note.text_size}
+        fields.update((key, value) for key, value in self.autosave.pending(note_id).items() if key in fields)
         
+        if note_widget is None:
+            note_widget = self.create_note_widget(note_id, **fields)
+        else:
+            note_widget.load_note(note_id, **fields)
+        self.apply_search_highlight(note_widget)
         return note_widget
     
+    def on_note_item_changed(self, note_id, item):
+        # Virtualization swapped the note's placeholder and widget
+        self.note_proxies[note_id] = item
+    
+    def apply_search_highlight(self, note_widget):
+        query = self.search_bar.text().strip()
+        if note_widget.search_text != query:
+            note_widget.highlight_search(query)
+    
     def trigger_search(self):
         self.search_timer.stop()
         self.search_timer.start(300)
     
+    @instrumentation.instrument('window.perform_search')
     def perform_search(self):
+        if self.note_ops is None:
+            return  # Runs again once the notes have loaded
         query = self.search_bar.text().strip()
         
-        # Store positions of existing notes
-        positions = {note_id: proxy.pos() for note_id, proxy in self.note_proxies.items()}
-        
-        # Clear and reload notes
-        self.board.scene.clear()
-        self.board.draw_grid()
-        self.note_proxies.clear()
-        
-        # Get matching notes
-        notes = self.note_ops.search_notes(query) if query else self.note_ops.get_all_notes()
-        
-        # Add notes and highlight matches
-        for note in notes:
-            note_widget = self.add_note_widget(note)
-            if query:
+        # Search what the user has actually typed. Only queued text edits need
+        # writing first; otherwise this is a lock check, not a synchronous flush.
+        if self.autosave.has_pending({'title', 'content'}):
+            self.autosave.flush()
+        
+        # Work out which notes change visibility instead of rebuilding the board
+        note_ids = self.note_proxies.keys()
+        matches = self.note_ops.search_note_ids(query) & note_ids if query else set(note_ids)
+        hidden = note_ids - matches
+        
+        for note_id in hidden - self.hidden_note_ids:
+            self.note_proxies[note_id].setVisible(False)
+        for note_id in self.hidden_note_ids - hidden:
+            self.note_proxies[note_id].setVisible(True)
+        self.board.notes_changed(self.note_proxies[note_id] for note_id in hidden ^ self.hidden_note_ids)
+        self.hidden_note_ids = hidden
+        
+        # Re-highlight matching notes in place
+        for note_id in matches:
+            note_widget = self.note_proxies[note_id].widget()
+            if note_widget is not None and note_widget.search_text != query:
                 note_widget.highlight_search(query)
-            
-            # Restore position if it existed before
-            if note.id in positions:
-                self.note_proxies[note.id].setPos(positions[note.id])
+        
+        # Release widgets hidden by the search and build newly shown ones
+        self.board.schedule_virtualization()
+    
+    def visible_note_ids(self):
+        """Return the ids of notes not hidden by the current search."""
+        return [note_id for note_id in self.note_proxies if note_id not in self.hidden_note_ids]
     
     def add_note(self):
-        self.add_note_widget()
+        # Place the new note near the viewport center without covering other notes
+        center = self.board.mapToScene(self.board.viewport().rect().center())
+        x, y = self.note_ops.find_free_position(center.x(), center.y())
+        self.add_note_widget(self.note_ops.create_note("", "", "#2d2d2d", position_x=x, position_y=y))
     
     def reset_zoom(self):
         self.board.reset_zoom()
     
+    def zoom_to_fit(self):
+        self.board.zoom_to_fit()
+    
     def update_note(self, note_id: int, title: str, content: str, color: str, text_size: int):
-        # Get the note's current position
-        if note_id in self.note_proxies:
-            pos = self.note_proxies[note_id].pos()
-            self.note_ops.update_note(
-                note_id, title, content,
-                color=color,
-                position_x=pos.x(),
-                position_y=pos.y(),
-                text_size=text_size
-            )
-        else:
-            self.note_ops.update_note(
-                note_id, title, content,
-                color=color,
-                text_size=text_size
-            )
+        fields = {'title': title, 'content': content, 'color': color, 'text_size': text_size}
+        
+        # Persisted later by the autosave worker. Positions are written by whatever
+        # moves a note (drag release, arrange, snap, undo), not read back here:
+        # mid-animation they aren't final yet.
+        self.autosave.enqueue(note_id, **fields)
+    
+    def on_autosave_flushed(self, note_ids):
+        # The worker wrote through its own session, so drop our cached state
+        self.session.expire_all()
     
     def delete_note(self, note_id: int):
-        if note_id in self.note_proxies:
-            self.note_proxies[note_id].scene().removeItem(self.note_proxies[note_id])
-            del self.note_proxies[note_id]
+        snapshots = self.snapshot_notes([note_id])
         
-        if not self.note_ops.delete_note(note_id):
+        if not self.remove_notes([note_id]):
             QMessageBox.warning(self, "Error", "Failed to delete note")
+            return
+        self.undo_stack.push(DeleteNotesCommand(snapshots))
+    
+    def on_note_geometry_committed(self, note_id, before, after):
+        # Persisted now rather than only when the window closes
+        self.autosave.enqueue(note_id, position_x=after.x(), position_y=after.y(),
+                              width=int(after.width()), height=int(after.height()))
+        
+        text = "Move Note" if before.size() == after.size() else "Resize Note"
+        self.undo_stack.push(GeometryCommand(
+            text,
+            {note_id: (before.x(), before.y(), before.width(), before.height())},
+            {note_id: (after.x(), after.y(), after.width(), after.height())},
+            mergeable=True
+        ))
+    
+    def on_note_property_changed(self, note_id, field, previous, value):
+        if field == 'color':
+            self.board.notes_changed([self.note_proxies[note_id]])
+        text = "Change Color" if field == 'color' else "Change Text Size"
+        self.undo_stack.push(FieldsCommand(text, {note_id: {field: previous}}, {note_id: {field: value}}))
+    
+    def undo(self):
+        if self.note_ops is None or self._load_queue:
+            return
+        # Queued edits could otherwise overwrite what the undo writes
+        self.autosave.flush()
+        self.undo_stack.undo()
+    
+    def redo(self):
+        if self.note_ops is None or self._load_queue:
+            return
+        self.autosave.flush()
+        self.undo_stack.redo()
+    
+    # Undo stack target: each call updates the board and writes one batch
+    
+    def apply_geometries(self, geometries):
+        self.board.finish_animation()
+        for note_id, (x, y, width, height) in geometries.items():
+            if note_id in self.note_proxies:
+                self.note_proxies[note_id].setGeometry(QRectF(x, y, width, height))
+        self.board.notes_changed(self.note_proxies[note_id] for note_id in geometries if note_id in self.note_proxies)
+        self.note_ops.update_geometries(geometries)
+        self.board.schedule_virtualization()
+    
+    def apply_fields(self, updates):
+        for note_id, fields in updates.items():
+            item = self.note_proxies.get(note_id)
+            if item is None:
+                continue
+            note_widget = item.widget()
+            if note_widget is None:
+                if 'color' in fields:
+                    item.set_color(fields['color'])
+                continue
+            # Written below; the widget's own signals would queue the same change again
+            note_widget.blockSignals(True)
+            try:
+                if 'color' in fields:
+                    note_widget.set_color(fields['color'])
+                if 'text_size' in fields:
+                    note_widget.update_text_size(fields['text_size'])
+            finally:
+                note_widget.blockSignals(False)
+        self.board.notes_changed(self.note_proxies[note_id] for note_id, fields in updates.items()
+                                 if 'color' in fields and note_id in self.note_proxies)
+        self.note_ops.apply_updates(updates)
+    
+    def restore_notes(self, snapshots):
+        remapped = self.note_ops.restore_notes(snapshots)
+        note_ids = [remapped.get(snapshot['note']['id'], snapshot['note']['id']) for snapshot in snapshots]
+        notes = self.note_ops.get_note_metadata(note_ids)
+        contents = {} if self.board.virtualized else self.note_ops.get_note_contents(note_ids)
+        for note in notes:
+            self.tracker.remember(note)
+            if self.board.virtualized:
+                self.add_note_placeholder(note)
+            else:
+                self.add_note_widget(note, contents.get(note.id, ""))
+        if self.search_bar.text().strip():
+            self.perform_search()
+        self.board.schedule_virtualization()
+        return remapped
+    
+    def snapshot_notes(self, note_ids):
+        """Capture notes for undoing their deletion, see NoteOperations.snapshot_notes."""
+        # Write queued edits first so undoing the delete brings them back too
+        self.autosave.flush()
+        return self.note_ops.snapshot_notes(note_ids)
+    
+    def remove_notes(self, note_ids):
+        """Take notes off the board and delete them; returns the number deleted."""
+        for note_id in note_ids:
+            self.autosave.discard(note_id)
+            self.hidden_note_ids.discard(note_id)
+            if note_id in self.note_proxies:
+                self.board.remove_note(note_id, self.note_proxies.pop(note_id))
+        return self.note_ops.delete_notes(note_ids)
     
     def closeEvent(self, event):
+        if self.db is None:
+            # Closed before the database was opened, nothing to save
+            self._load_queue = []
+            super().closeEvent(event)
+            return
+        
+        # Make sure queued edits reach the database before the final writes.
+        # Nothing else changes until the window is certain to close.
+        if not self.autosave.close():
+            answer = QMessageBox.warning(
+                self, "Unsaved Changes",
+                "Some note edits could not be saved. Close anyway and lose them?",
+                QMessageBox.StandardButton.Discard | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Cancel)
+            if answer != QMessageBox.StandardButton.Discard:
+                event.ignore()  # Keep the window open, the worker keeps retrying
+                return
+            self.autosave.stop()
+        self._load_queue = []
+        
         # Save viewport state
         viewport_state = self.board.get_viewport_state()
         self.note_ops.save_viewport_state(viewport_state)
         
         # Save all note positions and sizes before closing
-        for note_id, proxy in self.note_proxies.items():
-            pos = proxy.pos()
-            geometry = proxy.geometry()
-            note_widget = proxy.widget()
-            self.note_ops.update_note(
-                note_id, 
-                None, 
-                None, 
-                color=note_widget.color,
-                position_x=pos.x(),
-                position_y=pos.y(),
-                width=int(geometry.width()),
-                height=int(geometry.height())
-            )
+        self.board.finish_animation()
+        self.note_ops.update_geometries(self.note_geometries())
         
         self.db.close()
+        instrumentation.dump()
         super().closeEvent(event)
     
+    def note_geometries(self, note_ids=None):
+        """Return {note_id: (x, y, width, height)} for the notes on the board."""
+        if note_ids is None:
+            note_ids = self.note_proxies.keys()
+        geometries = {}
+        for note_id in note_ids:
+            geometry = self.note_proxies[note_id].geometry()
+            geometries[note_id] = (geometry.x(), geometry.y(),
+                                   geometry.width(), geometry.height())
+        return geometries
+    
     def snap_notes_to_grid(self):
-        grid_size = 100  # Same as the grid size in BoardView
-        for proxy in self.note_proxies.values():
+        self.board.finish_animation()
+        grid_size = self.board.grid_size
+        self.autosave.flush()  # Don't let queued edits overwrite the new positions
+        note_ids = self.visible_note_ids()
+        before = self.note_geometries(note_ids)
+        for note_id in note_ids:
+            proxy = self.note_proxies[note_id]
             current_pos = proxy.pos()
             # Round to nearest grid point
             new_x = round(current_pos.x() / grid_size) * grid_size
             new_y = round(current_pos.y() / grid_size) * grid_size
             proxy.setPos(new_x, new_y)
-            
-            # Update position in database
-            note_widget = proxy.widget()
-            if note_widget and note_widget.note_id:
-                self.note_ops.update_note(
-                    note_widget.note_id,
-                    "",
-                    note_widget.content_edit.toPlainText(),
-                    color=note_widget.color,
-                    position_x=new_x,
-                    position_y=new_y,
-                    text_size=note_widget.text_size
-                )
+        self.board.notes_changed(self.note_proxies[note_id] for note_id in note_ids)
+        
+        # Update positions in database
+        after = self.note_geometries(note_ids)
+        self.note_ops.update_geometries(after)
+        self.undo_stack.push(GeometryCommand("Snap to Grid", before, after))
+        self.board.schedule_virtualization()
     
     def arrange_notes(self):
-        if not self.note_proxies:
+        note_ids = self.visible_note_ids()
+        if not note_ids:
             return
-            
-        # Get the viewport center
-        viewport_center = self.board.mapToScene(self.board.viewport().rect().center())
-        
-        # Calculate grid dimensions
-        note_count = len(self.note_proxies)
-        grid_cols = max(2, int((note_count ** 0.5) // 1))  # Square root rounded down
-        grid_rows = (note_count + grid_cols - 1) // grid_cols  # Ceiling division
-        
-        # Calculate starting position
-        start_x = viewport_center.x() - (grid_cols * 400) / 2  # 400 = note width + spacing
-        start_y = viewport_center.y() - (grid_rows * 300) / 2  # 300 = note height + spacing
-        
-        # Arrange notes in a grid
-        col, row = 0, 0
-        for proxy in self.note_proxies.values():
-            new_x = start_x + col * 400
-            new_y = start_y + row * 300
-            
-            # Animate the movement
-            proxy.setPos(new_x, new_y)
-            
-            # Update position in database
-            note_widget = proxy.widget()
-            if note_widget and note_widget.note_id:
-                self.note_ops.update_note(
-                    note_widget.note_id,
-                    "",
-                    note_widget.content_edit.toPlainText(),
-                    color=note_widget.color,
-                    position_x=new_x,
-                    position_y=new_y,
-                    text_size=note_widget.text_size
-                )
-            
-            # Move to next position
-            col += 1
-            if col >= grid_cols:
-                col = 0
-                row += 1
+        self.board.finish_animation()
+        self.autosave.flush()  # Don't let queued edits overwrite the new positions
+        before = self.note_geometries(note_ids)
+        
+        # Pack the notes by their actual size, in the viewport's proportions
+        viewport = self.board.viewport().rect()
+        positions, width, height = layout_engine.arrange(
+            self.layout_items(note_ids), self.arrange_strategy, self.arrange_group_by, self.arrange_sort_by,
+            aspect=viewport.width() / max(1, viewport.height())
+        )
+        
+        # Center the layout on the viewport
+        viewport_center = self.board.mapToScene(viewport.center())
+        left = viewport_center.x() - width / 2
+        top = viewport_center.y() - height / 2
+        after = {note_id: (round(left + x), round(top + y)) + before[note_id][2:]
+                 for note_id, (x, y) in positions.items()}
+        
+        # One batched write; the board follows in one animated transition
+        self.note_ops.update_geometries(after)
+        self.undo_stack.push(GeometryCommand("Arrange Notes", before, after))
+        self.board.animate_moves({self.note_proxies[note_id]: QPointF(x, y)
+                                  for note_id, (x, y, _, _) in after.items()})
+    
+    def layout_items(self, note_ids):
+        """Describe notes for the layout engine, loading only what the options need."""
+        tags = self.note_ops.get_note_tag_names() if self.arrange_group_by == 'tag' else {}
+        updated = self.note_ops.get_note_update_times() if self.arrange_sort_by == 'updated' else {}
+        items = []
+        for note_id in note_ids:
+            item = self.note_proxies[note_id]
+            geometry = item.geometry()
+            note_widget = item.widget()
+            items.append(layout_engine.LayoutItem(
+                note_id, geometry.width(), geometry.height(), geometry.x(), geometry.y(),
+                color=note_widget.color if note_widget is not None else item.color,
+                tags=tuple(tags.get(note_id, ())),
+                updated_at=updated.get(note_id)
+            ))
+        return items
+    
+    def create_arrange_menu(self):
+        menu = QMenu(self)
+        sections = [
+            ("Layout", 'arrange_strategy',
+             [("Fill gaps (skyline)", 'skyline'), ("Rows (shelf)", 'shelf'), ("Uniform grid", 'grid')]),
+            ("Group by", 'arrange_group_by', [("Nothing", None), ("Tag", 'tag'), ("Color", 'color')]),
+            ("Order by", 'arrange_sort_by',
+             [("Size", 'size'), ("Last edited", 'updated'), ("Current position", 'position')]),
+        ]
+        for title, attribute, options in sections:
+            menu.addSection(title)
+            group = QActionGroup(menu)
+            for label, value in options:
+                action = menu.addAction(label)
+                action.setCheckable(True)
+                action.setChecked(getattr(self, attribute) == value)
+                action.triggered.connect(lambda checked, a=attribute, v=value: setattr(self, a, v))
+                group.addAction(action)
+        return menu
     
     def update_zoom_label(self, zoom_factor: float):
         """Update the zoom label with the current zoom percentage."""
         zoom_percentage = int(zoom_factor * 100)
         self.zoom_label.setText(f"Zoom: {zoom_percentage}%")
 
+class StartupProfiler(QObject):
+    """Report startup milestones for --profile-startup, then quit."""
+    def __init__(self, window, start=_PROCESS_START):
+        super().__init__(window)
+        self.window = window
+        self.start = start
+        self.milestones = []
+        self.mark("window built")
+        window.first_painted.connect(lambda: self.mark("first paint"))
+        window.notes_loaded.connect(self.on_notes_loaded)
+    
+    def mark(self, name):
+        self.milestones.append((name, time.perf_counter() - self.start))
+    
+    def on_notes_loaded(self, count):
+        self.mark("notes loaded")
+        # Interactive once the event loop has drained what loading queued
+        QTimer.singleShot(0, lambda: self.finish(count))
+    
+    def finish(self, count):
+        self.mark("all notes interactive")
+        print(f"Startup profile ({count} notes, times since process start):")
+        for name, elapsed in self.milestones:
+            print(f"  {name:<24}{elapsed * 1000:8.1f} ms")
+        self.window.close()
+        QApplication.quit()
+
+
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Modern Notes")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print time to first paint and to all notes interactive, then exit")
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
+    theme.install(app)
     
     window = MainWindow()
+    if args.profile_startup:
+        StartupProfiler(window)
     window.show()
     
     sys.exit(app.exec())
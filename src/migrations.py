@@ -0,0 +1,118 @@
+"""Versioned schema migrations.
+
+The schema version is kept in SQLite's ``user_version`` pragma. Opening a
+database that is already at ``SCHEMA_VERSION`` costs one pragma read; older
+databases (including ones created before versioning, which report 0) get the
+tables from the models and then every step newer than their version.
+
+Steps must be idempotent: the sqlite3 driver runs DDL outside a transaction,
+so a step interrupted halfway is simply run again on the next start.
+"""
+import logging
+
+from sqlalchemy import text
+
+import search_index
+import spatial_index
+from models import PREVIEW_LENGTH, NoteRevision
+
+logger = logging.getLogger(__name__)
+
+
+def _install_search_index(connection):
+    search_index.install(connection)
+
+
+def _install_spatial_index(connection):
+    spatial_index.install(connection)
+
+
+def _index_updated_at(connection):
+    # Note lists and search results are ordered by last edit
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_notes_updated_at ON notes (updated_at)"
+    ))
+
+
+def _unique_note_tags(connection):
+    # Older databases could link a tag to a note more than once
+    removed = connection.execute(text(
+        "DELETE FROM note_tags WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM note_tags GROUP BY note_id, tag_id)"
+    )).rowcount
+    if removed:
+        logger.info("Removed %d duplicate note tags", removed)
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_note_tags_note_tag ON note_tags (note_id, tag_id)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_note_tags_tag_id ON note_tags (tag_id)"
+    ))
+
+
+_PREVIEW_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_preview_ai AFTER INSERT ON notes
+    WHEN new.preview IS NULL BEGIN
+        UPDATE notes SET preview = substr(new.content, 1, {PREVIEW_LENGTH}) WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_preview_au AFTER UPDATE OF content ON notes BEGIN
+        UPDATE notes SET preview = substr(new.content, 1, {PREVIEW_LENGTH}) WHERE id = new.id;
+    END
+    """,
+]
+
+
+def _add_preview(connection):
+    # The board loads previews instead of full content. Triggers cover every writer;
+    # bulk inserts can skip the insert trigger by supplying the preview themselves.
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(notes)"))}
+    if 'preview' not in columns:
+        connection.execute(text(f"ALTER TABLE notes ADD COLUMN preview VARCHAR({PREVIEW_LENGTH})"))
+    for statement in _PREVIEW_TRIGGERS:
+        connection.execute(text(statement))
+    connection.execute(text(f"UPDATE notes SET preview = substr(content, 1, {PREVIEW_LENGTH})"))
+
+
+def _add_revisions(connection):
+    NoteRevision.__table__.create(connection, checkfirst=True)
+
+
+# Ordered steps; a database at version N has had the first N applied
+MIGRATIONS = [
+    _install_search_index,
+    _install_spatial_index,
+    _index_updated_at,
+    _unique_note_tags,
+    _add_preview,
+    _add_revisions,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(connection) -> int:
+    return connection.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def upgrade(engine, metadatas) -> int:
+    """Bring the database up to ``SCHEMA_VERSION`` and return the version it was at.
+
+    ``metadatas`` are the declarative metadata objects whose tables should
+    exist; ``create_all`` is only run when the database is out of date.
+    """
+    with engine.connect() as connection:
+        version = get_version(connection)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    for metadata in metadatas:
+        metadata.create_all(engine)
+
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(text(f"PRAGMA user_version = {number}"))
+        logger.info("Migrated database schema to version %d (%s)", number, step.__name__.lstrip('_'))
+    return version
\ No newline at end of file
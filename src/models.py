@@ -1,14 +1,19 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, Index, LargeBinary
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
 
+PREVIEW_LENGTH = 200  # Characters of content kept in Note.preview
+
 note_tags = Table(
     'note_tags',
     Base.metadata,
     Column('note_id', Integer, ForeignKey('notes.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id'))
+    Column('tag_id', Integer, ForeignKey('tags.id')),
+    # A note carries a tag at most once; the index also serves note -> tags lookups
+    Index('ux_note_tags_note_tag', 'note_id', 'tag_id', unique=True),
+    Index('ix_note_tags_tag_id', 'tag_id')
 )
 
 class Note(Base):
@@ -17,8 +22,9 @@ class Note(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String(200))
     content = Column(Text)
+    preview = Column(String(PREVIEW_LENGTH))  # Start of content, kept current by a trigger (see migrations)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     color = Column(String(7), default='#ffffff')  # Hex color code
     is_pinned = Column(Boolean, default=False)
     is_archived = Column(Boolean, default=False)
@@ -37,4 +43,19 @@ class Tag(Base):
     name = Column(String(50), unique=True)
     color = Column(String(7), default='#e0e0e0')  # Hex color code
     
-    notes = relationship('Note', secondary=note_tags, back_populates='tags') 
\ No newline at end of file
+    notes = relationship('Note', secondary=note_tags, back_populates='tags') 
+
+class NoteRevision(Base):
+    __tablename__ = 'note_revisions'
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(Integer, ForeignKey('notes.id'), nullable=False)
+    number = Column(Integer, nullable=False)  # Counts up per note
+    base_number = Column(Integer, nullable=False)  # Snapshot a delta applies to; equals number for snapshots
+    created_at = Column(DateTime, default=datetime.utcnow)
+    length = Column(Integer)  # Characters in the stored content
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed snapshot or delta (see revisions.py)
+    
+    __table_args__ = (
+        Index('ux_note_revisions_note_number', 'note_id', 'number', unique=True),
+    )
\ No newline at end of file
@@ -1,10 +1,17 @@
-from sqlalchemy.orm import Session
-from models import Note, Tag
-from typing import List, Optional
+from sqlalchemy.orm import Session, selectinload
+from models import Note, NoteRevision, Tag, note_tags
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, JSON
+from sqlalchemy import create_engine, text, update, insert, delete, select, func, bindparam, Column, Integer, String, Float, JSON
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 import json
+import difflib
+import instrumentation
+import revisions
+import search_index
+import spatial_index
+from change_tracker import ChangeTracker, GEOMETRY_FIELDS
 
 Base = declarative_base()
 
@@ -14,10 +21,21 @@ class ViewportState(Base):
     id = Column(Integer, primary_key=True)
     state = Column(JSON, nullable=False, default=dict)
 
+# Columns loaded for placing notes on the board
+NOTE_METADATA = (Note.id, Note.title, Note.preview, Note.color, Note.text_size,
+                 Note.position_x, Note.position_y, Note.width, Note.height,
+                 Note.is_pinned, Note.is_archived, Note.updated_at)
+
 class NoteOperations:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, tracker: Optional[ChangeTracker] = None,
+                 revision_policy: Optional[revisions.RevisionPolicy] = None):
         self.session = session
+        self.tracker = tracker  # Skips writes that wouldn't change anything
+        self.revision_policy = revision_policy or revisions.RevisionPolicy()
+        self._fts_available = None  # Checked lazily on first search
+        self._rtree_available = None  # Checked lazily on first spatial query
     
+    @instrumentation.instrument('ops.create_note')
     def create_note(self, title: str, content: str, color: str = "#2d2d2d",
                    position_x: float = None, position_y: float = None,
                    width: int = 300, height: int = 200,
@@ -36,8 +54,11 @@ class NoteOperations:
         )
         self.session.add(note)
         self.session.commit()
+        if self.tracker is not None:
+            self.tracker.remember(note)
         return note
     
+    @instrumentation.instrument('ops.update_note')
     def update_note(self, note_id: int, title: Optional[str] = None,
                    content: Optional[str] = None, color: Optional[str] = None,
                    position_x: Optional[float] = None,
@@ -47,72 +68,567 @@ class NoteOperations:
                    text_size: Optional[int] = None) -> Note:
         note = self.session.query(Note).get(note_id)
         if note:
-            if title is not None:
-                note.title = title
-            if content is not None:
-                note.content = content
-            if color is not None:
-                note.color = color
-            if position_x is not None:
-                note.position_x = position_x
-            if position_y is not None:
-                note.position_y = position_y
-            if width is not None:
-                note.width = width
-            if height is not None:
-                note.height = height
-            if text_size is not None:
-                note.text_size = text_size
+            fields = {
+                'title': title, 'content': content, 'color': color,
+                'position_x': position_x, 'position_y': position_y,
+                'width': width, 'height': height, 'text_size': text_size
+            }
+            fields = {field: value for field, value in fields.items() if value is not None}
+            if self.tracker is not None:
+                fields = self.tracker.changed_fields(note_id, fields)
+                if not fields:
+                    return note
+            
+            if 'content' in fields:
+                revisions.record(self.session, {note_id: note.content}, {note_id: fields['content']},
+                                 self.revision_policy)
+            for field, value in fields.items():
+                setattr(note, field, value)
             note.updated_at = datetime.utcnow()
             self.session.commit()
+            if self.tracker is not None:
+                self.tracker.mark_persisted(note_id, fields)
         return note
     
+    @instrumentation.instrument('ops.apply_updates')
+    def apply_updates(self, updates: Dict[int, dict], force_revision: bool = False) -> int:
+        """Apply pending field updates for many notes in a single transaction.
+        
+        ``updates`` maps note ids to dicts of column values, as collected by the
+        autosave queue. Content changes are recorded in the revision history
+        (``force_revision`` ignores its merge window). Returns the number of
+        notes written.
+        """
+        if self.tracker is not None:
+            updates = {note_id: self.tracker.changed_fields(note_id, fields)
+                       for note_id, fields in updates.items()}
+            updates = {note_id: fields for note_id, fields in updates.items() if fields}
+        if not updates:
+            return 0
+        
+        contents = {note_id: fields['content'] for note_id, fields in updates.items() if 'content' in fields}
+        # Inside the merge window the previous content isn't needed at all
+        due = revisions.due(self.session, contents, self.revision_policy, force=force_revision)
+        if due:
+            revisions.record(self.session, self.get_note_contents(due),
+                             {note_id: contents[note_id] for note_id in due},
+                             self.revision_policy, force=force_revision)
+        
+        # Only the changed columns are written, one executemany per set of columns
+        now = datetime.utcnow()
+        groups = {}
+        for note_id, fields in updates.items():
+            groups.setdefault(tuple(sorted(fields)), []).append((note_id, fields))
+        
+        table = Note.__table__
+        for columns, group in groups.items():
+            values = {column: bindparam(f'v_{column}') for column in columns}
+            # Moving a note doesn't make it more recent
+            touches_content = any(column not in GEOMETRY_FIELDS for column in columns)
+            values['updated_at'] = bindparam('v_updated_at') if touches_content else table.c.updated_at
+            stmt = update(table).where(table.c.id == bindparam('note_id')).values(values)
+            rows = [
+                dict({f'v_{column}': value for column, value in fields.items()},
+                     note_id=note_id, v_updated_at=now)
+                for note_id, fields in group
+            ]
+            self.session.execute(stmt, rows)
+        self.session.commit()
+        
+        if self.tracker is not None:
+            for note_id, fields in updates.items():
+                self.tracker.mark_persisted(note_id, fields)
+        return len(updates)
+    
+    def list_revisions(self, note_id: int) -> list:
+        """Return a note's revisions, newest first, without their content.
+        
+        Rows have ``number``, ``created_at``, ``length`` and ``is_snapshot``.
+        """
+        return self.session.execute(
+            select(NoteRevision.number, NoteRevision.created_at, NoteRevision.length,
+                   (NoteRevision.base_number == NoteRevision.number).label('is_snapshot'))
+            .where(NoteRevision.note_id == note_id)
+            .order_by(NoteRevision.number.desc())
+        ).all()
+    
+    def get_revision_content(self, note_id: int, number: int) -> Optional[str]:
+        return revisions.load(self.session, note_id, number)
+    
+    @instrumentation.instrument('ops.restore_revision')
+    def restore_revision(self, note_id: int, number: int) -> bool:
+        """Replace a note's content with a revision's; the replaced content becomes a revision too."""
+        content = revisions.load(self.session, note_id, number)
+        if content is None:
+            return False
+        self.apply_updates({note_id: {'content': content}}, force_revision=True)
+        return True
+    
+    def diff_revisions(self, note_id: int, old: int, new: Optional[int] = None) -> str:
+        """Return a unified diff between two revisions; ``new=None`` means the current content."""
+        old_content = revisions.load(self.session, note_id, old)
+        if new is None:
+            new_content = self.get_note_contents([note_id]).get(note_id)
+            new_label = "current"
+        else:
+            new_content = revisions.load(self.session, note_id, new)
+            new_label = f"revision {new}"
+        if old_content is None or new_content is None:
+            raise ValueError(f"Note {note_id} has no revision {old if old_content is None else new}")
+        return "".join(difflib.unified_diff(
+            old_content.splitlines(keepends=True), new_content.splitlines(keepends=True),
+            fromfile=f"revision {old}", tofile=new_label
+        ))
+    
+    @instrumentation.instrument('ops.update_geometries')
+    def update_geometries(self, geometries: Dict[int, Tuple[float, float, float, float]]) -> int:
+        """Persist positions and sizes for many notes in one executemany UPDATE.
+        
+        ``geometries`` maps note ids to ``(x, y, width, height)``. Moving notes
+        around does not count as editing them, so ``updated_at`` is left alone.
+        Returns the number of notes written.
+        """
+        if self.tracker is not None:
+            geometries = {
+                note_id: geometry for note_id, geometry in geometries.items()
+                if self.tracker.changed_fields(note_id, self._geometry_fields(geometry))
+            }
+        if not geometries:
+            return 0
+        
+        table = Note.__table__
+        stmt = update(table).where(table.c.id == bindparam('note_id')).values(
+            position_x=bindparam('x'),
+            position_y=bindparam('y'),
+            width=bindparam('w'),
+            height=bindparam('h'),
+            updated_at=table.c.updated_at  # Keep the onupdate default from firing
+        )
+        rows = [
+            {'note_id': note_id, 'x': x, 'y': y, 'w': int(w), 'h': int(h)}
+            for note_id, (x, y, w, h) in geometries.items()
+        ]
+        self.session.execute(stmt, rows)
+        self.session.commit()
+        
+        if self.tracker is not None:
+            for note_id, geometry in geometries.items():
+                self.tracker.mark_persisted(note_id, self._geometry_fields(geometry))
+        return len(rows)
+    
+    @staticmethod
+    def _geometry_fields(geometry: Tuple[float, float, float, float]) -> dict:
+        x, y, w, h = geometry
+        return {'position_x': x, 'position_y': y, 'width': int(w), 'height': int(h)}
+    
     def delete_note(self, note_id: int) -> bool:
-        note = self.session.query(Note).get(note_id)
-        if note:
-            self.session.delete(note)
-            self.session.commit()
-            return True
-        return False
+        return self.delete_notes([note_id]) > 0
+    
+    @instrumentation.instrument('ops.delete_notes')
+    def delete_notes(self, note_ids: Iterable[int]) -> int:
+        """Delete notes with their tag links and revisions in one transaction.
+        
+        Returns the number of notes deleted.
+        """
+        note_ids = list(set(note_ids))
+        if not note_ids:
+            return 0
+        
+        self.session.execute(delete(note_tags).where(note_tags.c.note_id.in_(note_ids)))
+        self.session.execute(delete(NoteRevision).where(NoteRevision.note_id.in_(note_ids)))
+        deleted = self.session.execute(delete(Note).where(Note.id.in_(note_ids))).rowcount
+        self.session.commit()
+        if self.tracker is not None:
+            for note_id in note_ids:
+                self.tracker.forget(note_id)
+        return deleted
     
-    def get_all_notes(self) -> List[Note]:
-        return self.session.query(Note).order_by(Note.updated_at.desc()).all()
+    def snapshot_notes(self, note_ids: Iterable[int]) -> List[dict]:
+        """Capture everything restore_notes needs to bring deleted notes back.
+        
+        Each snapshot is ``{'note': row, 'tags': [tag_id], 'revisions': [row]}``
+        with rows as plain dicts of column values.
+        """
+        note_ids = list(note_ids)
+        notes = Note.__table__
+        revision_table = NoteRevision.__table__
+        
+        tags = {}
+        for note_id, tag_id in self.session.execute(
+            select(note_tags.c.note_id, note_tags.c.tag_id).where(note_tags.c.note_id.in_(note_ids))
+        ):
+            tags.setdefault(note_id, []).append(tag_id)
+        
+        # Revision ids aren't kept; restored revisions get new ones
+        history = {}
+        columns = [column for column in revision_table.c if column.name != 'id']
+        for row in self.session.execute(
+            select(*columns).where(revision_table.c.note_id.in_(note_ids))
+        ).mappings():
+            history.setdefault(row['note_id'], []).append(dict(row))
+        
+        return [
+            {'note': dict(row), 'tags': tags.get(row['id'], []), 'revisions': history.get(row['id'], [])}
+            for row in self.session.execute(select(notes).where(notes.c.id.in_(note_ids))).mappings()
+        ]
+    
+    @instrumentation.instrument('ops.restore_notes')
+    def restore_notes(self, snapshots: List[dict]) -> Dict[int, int]:
+        """Re-insert notes captured by snapshot_notes in one transaction.
+        
+        Notes keep their ids unless a note created since has taken them; the
+        returned dict maps those old ids to the new ones.
+        """
+        if not snapshots:
+            return {}
+        table = Note.__table__
+        wanted = [snapshot['note']['id'] for snapshot in snapshots]
+        taken = {note_id for (note_id,) in
+                 self.session.execute(select(table.c.id).where(table.c.id.in_(wanted)))}
+        
+        free = [snapshot['note'] for snapshot in snapshots if snapshot['note']['id'] not in taken]
+        if free:
+            self.session.execute(insert(table), free)
+        remapped = {}
+        for note_id in taken:
+            row = next(snapshot['note'] for snapshot in snapshots if snapshot['note']['id'] == note_id)
+            values = {column: value for column, value in row.items() if column != 'id'}
+            remapped[note_id] = self.session.execute(insert(table).values(values)).inserted_primary_key[0]
+        
+        links = [{'note_id': remapped.get(snapshot['note']['id'], snapshot['note']['id']), 'tag_id': tag_id}
+                 for snapshot in snapshots for tag_id in snapshot['tags']]
+        if links:
+            self.session.execute(insert(note_tags).prefix_with('OR IGNORE'), links)
+        history = [dict(revision, note_id=remapped.get(revision['note_id'], revision['note_id']))
+                   for snapshot in snapshots for revision in snapshot['revisions']]
+        if history:
+            self.session.execute(insert(NoteRevision.__table__), history)
+        self.session.commit()
+        return remapped
+    
+    @instrumentation.instrument('ops.get_all_notes')
+    def get_all_notes(self, with_tags: bool = False) -> List[Note]:
+        query = self.session.query(Note)
+        if with_tags:
+            # One extra query for all tags instead of one per note
+            query = query.options(selectinload(Note.tags))
+        return query.order_by(Note.updated_at.desc()).all()
+    
+    @instrumentation.instrument('ops.get_note_metadata')
+    def get_note_metadata(self, note_ids: Optional[Iterable[int]] = None) -> list:
+        """Return what the board needs to place every note (or the given ones),
+        without its content.
+        
+        Rows have the Note attribute names of NOTE_METADATA (``preview`` holds
+        the start of the content); use get_note_contents for the full text.
+        Plain rows skip the ORM identity map, so the cost tracks the number of
+        notes rather than how much they contain.
+        """
+        query = select(*NOTE_METADATA).order_by(Note.updated_at.desc())
+        if note_ids is not None:
+            query = query.where(Note.id.in_(list(note_ids)))
+        return self.session.execute(query).all()
+    
+    def get_note_contents(self, note_ids: Iterable[int]) -> Dict[int, str]:
+        """Return {note_id: content} for the given notes in one query."""
+        note_ids = list(note_ids)
+        if not note_ids:
+            return {}
+        rows = self.session.execute(select(Note.id, Note.content).where(Note.id.in_(note_ids)))
+        return {note_id: content or "" for note_id, content in rows}
     
     def search_notes(self, query: str) -> List[Note]:
+        """Return notes matching the query, best matches first."""
+        return [note for note, _ in self.search_notes_with_snippets(query)]
+    
+    @instrumentation.instrument('ops.search_notes_with_snippets')
+    def search_notes_with_snippets(self, query: str, limit: Optional[int] = None,
+                                   highlight: Tuple[str, str] = ('<b>', '</b>')) -> List[Tuple[Note, str]]:
+        """Full-text search returning (note, snippet) pairs ranked by bm25.
+        
+        Bare words match as prefixes, "quoted text" as phrases, and every term
+        must match. Falls back to a LIKE scan (with empty snippets) when FTS5
+        is unavailable or the query can't be expressed as a MATCH.
+        """
+        match = search_index.build_match_query(query)
+        if match and self._has_fts():
+            try:
+                return self._fts_search(match, limit, highlight)
+            except OperationalError:
+                self.session.rollback()
+        return [(note, "") for note in self._like_search(query, limit)]
+    
+    @instrumentation.instrument('ops.search_note_ids')
+    def search_note_ids(self, query: str) -> Set[int]:
+        """Return the ids of notes matching the query without loading the notes."""
+        match = search_index.build_match_query(query)
+        if match and self._has_fts():
+            try:
+                rows = self.session.execute(
+                    text(f"SELECT rowid FROM {search_index.FTS_TABLE} "
+                         f"WHERE {search_index.FTS_TABLE} MATCH :match"),
+                    {'match': match}
+                )
+                return {note_id for (note_id,) in rows}
+            except OperationalError:
+                self.session.rollback()
+        
         search = f"%{query}%"
-        return self.session.query(Note).filter(
+        rows = self.session.query(Note.id).filter(
             (Note.title.ilike(search)) | (Note.content.ilike(search))
-        ).order_by(Note.updated_at.desc()).all()
+        )
+        return {note_id for (note_id,) in rows}
+    
+    def _has_fts(self) -> bool:
+        if self._fts_available is None:
+            self._fts_available = search_index.is_installed(self.session.connection())
+        return self._fts_available
+    
+    def _fts_search(self, match: str, limit: Optional[int],
+                    highlight: Tuple[str, str]) -> List[Tuple[Note, str]]:
+        # Title hits weigh more than content hits
+        sql = f"""
+            SELECT rowid, snippet({search_index.FTS_TABLE}, -1, :start, :end, '…', 12)
+            FROM {search_index.FTS_TABLE}
+            WHERE {search_index.FTS_TABLE} MATCH :match
+            ORDER BY bm25({search_index.FTS_TABLE}, 10.0, 1.0)
+        """
+        params = {'match': match, 'start': highlight[0], 'end': highlight[1]}
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params['limit'] = limit
+        hits = self.session.execute(text(sql), params).all()
+        if not hits:
+            return []
+        
+        notes = {note.id: note for note in
+                 self.session.query(Note).filter(Note.id.in_([note_id for note_id, _ in hits]))}
+        return [(notes[note_id], snippet) for note_id, snippet in hits if note_id in notes]
+    
+    def _like_search(self, query: str, limit: Optional[int]) -> List[Note]:
+        search = f"%{query}%"
+        notes = self.session.query(Note).filter(
+            (Note.title.ilike(search)) | (Note.content.ilike(search))
+        ).order_by(Note.updated_at.desc())
+        if limit is not None:
+            notes = notes.limit(limit)
+        return notes.all()
+    
+    @instrumentation.instrument('ops.get_notes_in_rect')
+    def get_notes_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[Note]:
+        """Return notes whose bounds intersect the rectangle (x0, y0)-(x1, y1)."""
+        note_ids = [note_id for note_id, _ in self._boxes_in_rect(x0, y0, x1, y1)]
+        if not note_ids:
+            return []
+        return self.session.query(Note).filter(Note.id.in_(note_ids)).all()
+    
+    @instrumentation.instrument('ops.get_nearest_notes')
+    def get_nearest_notes(self, x: float, y: float, limit: int = 1) -> List[Note]:
+        """Return up to ``limit`` notes closest to the point, nearest first.
+        
+        Searches a square window around the point that doubles in size until
+        it holds enough notes that nothing outside it could be closer.
+        """
+        radius = 500.0
+        while True:
+            boxes = self._boxes_in_rect(x - radius, y - radius, x + radius, y + radius)
+            ranked = sorted(
+                (spatial_index.distance_to_box(x, y, *box), note_id) for note_id, box in boxes
+            )
+            # Anything outside the window is at least `radius` away
+            found = [note_id for distance, note_id in ranked if distance <= radius][:limit]
+            if len(found) >= limit:
+                break
+            if self._window_covers_all(x, y, radius):
+                # Every note is in the window, including its corners beyond `radius`
+                found = [note_id for _, note_id in ranked][:limit]
+                break
+            radius *= 2
+        
+        if not found:
+            return []
+        notes = {note.id: note for note in self.session.query(Note).filter(Note.id.in_(found))}
+        return [notes[note_id] for note_id in found if note_id in notes]
+    
+    @instrumentation.instrument('ops.find_free_position')
+    def find_free_position(self, x: float, y: float, width: float = 300, height: float = 200,
+                           step: float = 50, max_rings: int = 20) -> Tuple[float, float]:
+        """Find a spot near (x, y) where a note of the given size overlaps no other note.
+        
+        Probes positions on square rings of growing size around the start and
+        falls back to (x, y) if everything nearby is taken.
+        """
+        for ring in range(max_rings + 1):
+            for dx, dy in self._ring_offsets(ring):
+                px, py = x + dx * step, y + dy * step
+                if not self._boxes_in_rect(px, py, px + width, py + height):
+                    return px, py
+        return x, y
+    
+    @staticmethod
+    def _ring_offsets(ring: int):
+        if ring == 0:
+            yield 0, 0
+            return
+        for i in range(-ring, ring + 1):
+            yield i, -ring
+            yield i, ring
+        for i in range(-ring + 1, ring):
+            yield -ring, i
+            yield ring, i
+    
+    def _has_rtree(self) -> bool:
+        if self._rtree_available is None:
+            self._rtree_available = spatial_index.is_installed(self.session.connection())
+        return self._rtree_available
+    
+    def _boxes_in_rect(self, x0: float, y0: float, x1: float, y1: float):
+        """Return [(note_id, (min_x, max_x, min_y, max_y))] intersecting the rectangle."""
+        params = {'x0': min(x0, x1), 'x1': max(x0, x1), 'y0': min(y0, y1), 'y1': max(y0, y1)}
+        if self._has_rtree():
+            sql = f"""
+                SELECT id, min_x, max_x, min_y, max_y FROM {spatial_index.RTREE_TABLE}
+                WHERE max_x >= :x0 AND min_x <= :x1 AND max_y >= :y0 AND min_y <= :y1
+            """
+        else:
+            sql = """
+                SELECT id, min_x, max_x, min_y, max_y FROM (
+                    SELECT id, position_x AS min_x, position_x + COALESCE(width, 300) AS max_x,
+                           position_y AS min_y, position_y + COALESCE(height, 200) AS max_y
+                    FROM notes WHERE position_x IS NOT NULL AND position_y IS NOT NULL
+                )
+                WHERE max_x >= :x0 AND min_x <= :x1 AND max_y >= :y0 AND min_y <= :y1
+            """
+        rows = self.session.execute(text(sql), params)
+        return [(row[0], tuple(row[1:])) for row in rows]
+    
+    def _window_covers_all(self, x: float, y: float, radius: float) -> bool:
+        if self._has_rtree():
+            sql = f"SELECT MIN(min_x), MAX(max_x), MIN(min_y), MAX(max_y) FROM {spatial_index.RTREE_TABLE}"
+        else:
+            sql = """
+                SELECT MIN(position_x), MAX(position_x + COALESCE(width, 300)),
+                       MIN(position_y), MAX(position_y + COALESCE(height, 200))
+                FROM notes WHERE position_x IS NOT NULL AND position_y IS NOT NULL
+            """
+        min_x, max_x, min_y, max_y = self.session.execute(text(sql)).one()
+        if min_x is None:
+            return True
+        return (x - radius <= min_x and x + radius >= max_x and
+                y - radius <= min_y and y + radius >= max_y)
     
     def add_tag(self, note_id: int, tag_name: str, color: str = "#e0e0e0") -> Optional[Tag]:
         note = self.session.query(Note).get(note_id)
         if not note:
             return None
             
-        tag = self.session.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name, color=color)
-            self.session.add(tag)
-            
-        note.tags.append(tag)
+        tag = self._tags_by_name([tag_name], color)[tag_name]
+        self._link_tags([note_id], [tag])
         self.session.commit()
         return tag
     
+    @instrumentation.instrument('ops.add_tags')
+    def add_tags(self, note_ids: Iterable[int], tag_names: Iterable[str], color: str = "#e0e0e0") -> int:
+        """Tag every given note with every given tag in one transaction.
+        
+        Missing tags are created with ``color``; links that already exist are
+        left alone. Returns the number of links added.
+        """
+        tag_names = list(dict.fromkeys(tag_names))
+        note_ids = list(dict.fromkeys(note_ids))
+        if not tag_names or not note_ids:
+            return 0
+        
+        # Unknown note ids are skipped (SQLite doesn't enforce the foreign key)
+        existing = [note_id for (note_id,) in
+                    self.session.query(Note.id).filter(Note.id.in_(note_ids))]
+        tags = self._tags_by_name(tag_names, color)
+        added = self._link_tags(existing, tags.values())
+        self.session.commit()
+        return added
+    
     def remove_tag(self, note_id: int, tag_name: str) -> bool:
-        note = self.session.query(Note).get(note_id)
-        if not note:
-            return False
-            
-        tag = self.session.query(Tag).filter(Tag.name == tag_name).first()
-        if tag and tag in note.tags:
-            note.tags.remove(tag)
-            self.session.commit()
-            return True
-        return False
+        return self.remove_tags([note_id], [tag_name]) > 0
+    
+    @instrumentation.instrument('ops.remove_tags')
+    def remove_tags(self, note_ids: Iterable[int], tag_names: Iterable[str]) -> int:
+        """Remove the given tags from the given notes in one statement.
+        
+        Returns the number of links removed. The tags themselves are kept.
+        """
+        tag_names = list(set(tag_names))
+        note_ids = list(set(note_ids))
+        if not tag_names or not note_ids:
+            return 0
+        
+        tag_ids = select(Tag.id).where(Tag.name.in_(tag_names))
+        removed = self.session.execute(
+            delete(note_tags).where(note_tags.c.note_id.in_(note_ids),
+                                    note_tags.c.tag_id.in_(tag_ids))
+        ).rowcount
+        self.session.commit()
+        return removed
+    
+    def _tags_by_name(self, tag_names: List[str], color: str) -> Dict[str, Tag]:
+        """Look tags up by name in one query, creating the missing ones."""
+        tags = {tag.name: tag for tag in self.session.query(Tag).filter(Tag.name.in_(tag_names))}
+        missing = [Tag(name=name, color=color) for name in tag_names if name not in tags]
+        if missing:
+            self.session.add_all(missing)
+            self.session.flush()  # Assign ids
+            tags.update((tag.name, tag) for tag in missing)
+        return tags
+    
+    def _link_tags(self, note_ids: List[int], tags: Iterable[Tag]) -> int:
+        rows = [{'note_id': note_id, 'tag_id': tag.id} for tag in tags for note_id in note_ids]
+        if not rows:
+            return 0
+        # The unique (note_id, tag_id) index turns repeats into no-ops
+        return self.session.execute(insert(note_tags).prefix_with('OR IGNORE'), rows).rowcount
+    
+    def get_note_tag_names(self) -> Dict[int, List[str]]:
+        """Return {note_id: [tag name]} for every tagged note in one query."""
+        names = {}
+        for note_id, name in self.session.execute(
+            select(note_tags.c.note_id, Tag.name).join(Tag, Tag.id == note_tags.c.tag_id)
+        ):
+            names.setdefault(note_id, []).append(name)
+        return names
+    
+    def get_note_update_times(self) -> Dict[int, datetime]:
+        """Return {note_id: updated_at} for every note in one query."""
+        return dict(self.session.execute(select(Note.id, Note.updated_at)).all())
     
     def get_tags(self) -> List[Tag]:
         return self.session.query(Tag).all()
     
+    def get_tag_counts(self) -> List[Tuple[Tag, int]]:
+        """Return every tag with the number of notes carrying it, by name."""
+        return self.session.query(Tag, func.count(note_tags.c.note_id)).outerjoin(
+            note_tags, note_tags.c.tag_id == Tag.id
+        ).group_by(Tag.id).order_by(Tag.name).all()
+    
+    @instrumentation.instrument('ops.get_notes_with_tags')
+    def get_notes_with_tags(self, tag_names: Iterable[str], match_all: bool = False) -> List[Note]:
+        """Return notes carrying any (or, with ``match_all``, every) given tag.
+        
+        Tags are loaded eagerly, so the result costs two queries however many
+        notes it holds. Returns an empty list when no tag names are given.
+        """
+        tag_names = set(tag_names)
+        if not tag_names:
+            return []
+        
+        matching = select(note_tags.c.note_id).join(
+            Tag, Tag.id == note_tags.c.tag_id
+        ).where(Tag.name.in_(tag_names)).group_by(note_tags.c.note_id)
+        if match_all:
+            matching = matching.having(func.count(Tag.id) == len(tag_names))
+        
+        return self.session.query(Note).options(selectinload(Note.tags)).filter(
+            Note.id.in_(matching)
+        ).order_by(Note.updated_at.desc()).all()
+    
     def save_viewport_state(self, state):
         """Save the viewport state to the database."""
         # Delete any existing state
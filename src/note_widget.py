@@ -2,34 +2,160 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QTextEdit, QLineEdit, QLabel, QMenu, QSizePolicy)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import (QAction, QColor, QPalette, QTextCharFormat, QSyntaxHighlighter, 
-                        QKeySequence, QShortcut)
+                        QKeySequence, QShortcut, QTextBlockUserData)
 from datetime import datetime
 import logging
+import re
+import instrumentation
+import search_index
+import theme
 
 logger = logging.getLogger(__name__)
 
+class _BlockMatches(QTextBlockUserData):
+    """Match spans cached on a text block for one block revision and pattern."""
+    def __init__(self, key, spans):
+        super().__init__()
+        self.key = key
+        self.spans = spans
+
 class SearchHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None, search_text=""):
+    """Highlights every occurrence of one or more search terms.
+    
+    Terms are split like the search bar query ("quoted phrases" stay
+    together) and matched case-insensitively in a single regex pass.
+    Optional whole-word and raw regex modes are supported. Match spans are
+    cached per block revision, and changing the query only re-renders the
+    blocks whose matches actually changed.
+    """
+    max_block_rehighlights = 16
+    min_cached_block_length = 1024  # Shorter blocks are cheaper to rescan than to cache
+    
+    def __init__(self, parent=None, search_text="", whole_word=False, regex=False):
         super().__init__(parent)
         self.search_text = search_text
+        self.whole_word = whole_word
+        self.regex = regex
         self.highlight_format = QTextCharFormat()
         self.highlight_format.setBackground(QColor("#4d4d00"))  # Dark yellow background
         self.highlight_format.setForeground(QColor("#ffffff"))  # White text
+        self._pattern = None
+        self._pattern_key = None
+        self._pass_matches = None  # Block matches precomputed for a rehighlight pass
+        self._compile()
 
-    def set_search_text(self, text):
+    def set_search_text(self, text, whole_word=None, regex=None):
         self.search_text = text
-        self.rehighlight()
+        if whole_word is not None:
+            self.whole_word = whole_word
+        if regex is not None:
+            self.regex = regex
+        
+        old_pattern = self._pattern
+        if self._compile():
+            self._rehighlight_changed_blocks(old_pattern)
 
-    def highlightBlock(self, text):
+    def _compile(self):
+        """Build the match pattern; returns False if it didn't change."""
+        key = (self.search_text, self.whole_word, self.regex)
+        if key == self._pattern_key:
+            return False
+        self._pattern_key = key
+        self._pattern = None
+        
         if not self.search_text:
+            return True
+        if self.regex:
+            source = self.search_text
+        else:
+            # Longest terms first so overlapping terms prefer the longer match
+            terms = sorted(search_index.split_terms(self.search_text), key=len, reverse=True)
+            if not terms:
+                return True
+            source = '|'.join(re.escape(term) for term in terms)
+        if self.whole_word:
+            source = rf'\b(?:{source})\b'
+        try:
+            self._pattern = re.compile(source, re.IGNORECASE | re.MULTILINE)
+        except re.error:
+            logger.debug("Invalid search pattern %r", source)
+        return True
+
+    def _rehighlight_changed_blocks(self, old_pattern):
+        document = self.document()
+        if document is None:
             return
-            
-        for match in text.lower().split(self.search_text.lower()):
-            index = text.lower().find(self.search_text.lower(), 
-                                    0 if match == text.lower().split(self.search_text.lower())[0] 
-                                    else len(match) + len(self.search_text))
-            if index >= 0:
-                self.setFormat(index, len(self.search_text), self.highlight_format)
+        
+        # What the old pattern matches in the current text is exactly what is
+        # rendered now. Each rehighlightBlock triggers its own relayout, so
+        # past a handful of blocks one full pass is cheaper.
+        limit = self.max_block_rehighlights
+        old_matches = self._matches_by_block(old_pattern, document, limit)
+        new_matches = self._matches_by_block(self._pattern, document, limit)
+        if old_matches is None or new_matches is None:
+            self.rehighlight()
+            return
+        
+        changed = [number for number in old_matches.keys() | new_matches.keys()
+                   if old_matches.get(number) != new_matches.get(number)]
+        self._pass_matches = new_matches  # Saves highlightBlock a rescan
+        try:
+            for number in changed:
+                self.rehighlightBlock(document.findBlockByNumber(number))
+        finally:
+            self._pass_matches = None
+
+    def _scan(self, text):
+        if self._pattern is None:
+            return []
+        return [(m.start(), m.end()) for m in self._pattern.finditer(text) if m.end() > m.start()]
+
+    @staticmethod
+    def _matches_by_block(pattern, document, limit):
+        """Group match spans by block number, relative to the block start.
+        
+        Scans each block's own text, as highlightBlock sees it, so soft line
+        breaks (U+2028) inside a block don't shift the mapping. Returns None
+        as soon as more than ``limit`` blocks contain matches.
+        """
+        by_block = {}
+        if pattern is None:
+            return by_block
+        
+        block = document.begin()
+        while block.isValid():
+            spans = [m.span() for m in pattern.finditer(block.text()) if m.end() > m.start()]
+            if spans:
+                if len(by_block) == limit:
+                    return None
+                by_block[block.blockNumber()] = spans
+            block = block.next()
+        return by_block
+
+    def _block_spans(self, block, text):
+        if self._pass_matches is not None:
+            return self._pass_matches.get(block.blockNumber(), [])
+        if len(text) < self.min_cached_block_length:
+            return self._scan(text)
+        
+        key = (block.revision(), self._pattern_key)
+        data = block.userData()
+        if isinstance(data, _BlockMatches) and data.key == key:
+            return data.spans
+        spans = self._scan(text)
+        block.setUserData(_BlockMatches(key, spans))
+        return spans
+
+    def highlightBlock(self, text):
+        spans = self._block_spans(self.currentBlock(), text)
+        if spans and not text.isascii() and len(text.encode('utf-16-le')) != 2 * len(text):
+            # Qt positions count UTF-16 code units, not code points
+            units = [0]
+            for ch in text:
+                units.append(units[-1] + (2 if ord(ch) > 0xFFFF else 1))
+            spans = [(units[start], units[end]) for start, end in spans]
+        for start, end in spans:
+            self.setFormat(start, end - start, self.highlight_format)
 
 class DraggableHeader(QWidget):
     def __init__(self, parent=None):
@@ -50,6 +176,7 @@ class DraggableHeader(QWidget):
 class NoteWidget(QWidget):
     deleted = pyqtSignal(int)  # Signal emitted when note is deleted
     updated = pyqtSignal(int, str, str, str, int)  # Signal emitted when note is updated (id, title, content, color, text_size)
+    property_changed = pyqtSignal(int, str, object, object)  # (id, 'color' or 'text_size', old value, new value)
 
     def __init__(self, note_id=None, title="", content="", color="#2d2d2d", text_size=14, parent=None):
         super().__init__(parent)
@@ -70,6 +197,7 @@ class NoteWidget(QWidget):
         
         # Create a container widget for the note content
         self.content_container = QWidget()
+        self.content_container.setObjectName("noteContainer")
         content_layout = QVBoxLayout(self.content_container)
         content_layout.setSpacing(5)
         content_layout.setContentsMargins(0, 0, 0, 0)
@@ -126,31 +254,34 @@ class NoteWidget(QWidget):
         
         logger.debug("Note widget UI initialized")
     
-    def highlight_search(self, search_text):
+    def load_note(self, note_id, content, color, text_size):
+        """Reuse this widget for another note without emitting updates."""
+        self.note_id = None  # Suppress note_modified while the fields change
+        self.text_size = text_size
+        self.content_edit.setPlainText(content or "")
+        self.set_color(color)
+        self.update_text_size(text_size)
+        self.last_modified.setText("Last modified: Just now")
+        self.note_id = note_id
+    
+    @instrumentation.instrument('note.highlight_search')
+    def highlight_search(self, search_text, whole_word=None, regex=None):
         self.search_text = search_text
-        self.highlighter.set_search_text(search_text)
+        self.highlighter.set_search_text(search_text, whole_word, regex)
     
     def update_text_size(self, size):
-        self.text_size = size
+        previous, self.text_size = self.text_size, size
         if self.content_edit:  # Check if content_edit exists
-            self.content_edit.setStyleSheet(f"font-size: {size}px;")
+            theme.apply_text_size(self.content_edit, size)
             self.note_modified()
+            self.emit_property_changed('text_size', previous, size)
     
     def show_menu(self):
         menu = QMenu(self)
         
         # Color submenu
         color_menu = QMenu("Change Color", self)
-        colors = {
-            "Dark Gray": "#2d2d2d",
-            "Blue": "#1e3242",
-            "Green": "#1e3c2d",
-            "Purple": "#2d1e42",
-            "Red": "#421e1e",
-            "Orange": "#422d1e"
-        }
-        
-        for name, color in colors.items():
+        for name, color in theme.NOTE_COLORS.items():
             action = QAction(name, self)
             action.triggered.connect(lambda checked, c=color: self.set_color(c))
             color_menu.addAction(action)
@@ -186,51 +317,14 @@ class NoteWidget(QWidget):
         menu.exec(self.mapToGlobal(self.rect().topRight()))
     
     def set_color(self, color):
-        self.color = color
-        self.content_container.setStyleSheet(f"""
-            QWidget {{
-                background-color: {color};
-                border-radius: 5px;
-                border: 1px solid #333333;
-            }}
-            QTextEdit {{
-                border: none;
-                background: transparent;
-                color: #ffffff;
-                font-size: {self.text_size}px;
-                selection-background-color: #264f78;
-            }}
-            QTextEdit::placeholder {{
-                color: #888888;
-            }}
-            QPushButton {{
-                border: none;
-                background: transparent;
-                color: #ffffff;
-                font-size: 18px;
-                padding: 5px;
-            }}
-            QPushButton:hover {{
-                background-color: rgba(255, 255, 255, 0.1);
-                border-radius: 15px;
-            }}
-            QLabel {{
-                color: #888888;
-                font-size: 12px;
-            }}
-            QMenu {{
-                background-color: #2d2d2d;
-                border: 1px solid #333333;
-                color: #ffffff;
-            }}
-            QMenu::item {{
-                padding: 5px 20px;
-            }}
-            QMenu::item:selected {{
-                background-color: #264f78;
-            }}
-        """)
+        previous, self.color = self.color, color
+        theme.apply_note_color(self.content_container, color)
         self.note_modified()
+        self.emit_property_changed('color', previous, color)
+    
+    def emit_property_changed(self, field, previous, value):
+        if self.note_id is not None and previous != value:
+            self.property_changed.emit(self.note_id, field, previous, value)
     
     def note_modified(self):
         if self.note_id is not None and hasattr(self, 'last_modified'):
@@ -0,0 +1,203 @@
+"""Note revision history stored as compressed snapshots and deltas.
+
+A revision records a note's content as it was before an edit. Revisions are
+numbered per note; every ``snapshot_interval``-th one is a full snapshot and
+the rest are deltas against the latest snapshot before them, so any revision
+is rebuilt from at most two rows. A delta keeps only what differs from its
+snapshot: the length of the common prefix and suffix plus the text in
+between. All payloads are zlib-compressed.
+
+Edits arrive every autosave, so a new revision is only written when the last
+one is older than ``merge_window`` seconds, or when an edit removes more than
+half of a note (e.g. an accidental select-all-delete).
+"""
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from models import Note, NoteRevision
+
+_DELTA_HEADER = struct.Struct('>II')  # Common prefix and suffix lengths, in characters
+
+
+class RevisionPolicy:
+    """How often snapshots are taken and how much history is kept.
+
+    Defaults come from NOTES_REVISION_SNAPSHOT_INTERVAL, NOTES_REVISION_RETENTION
+    (revisions kept per note, 0 disables history) and NOTES_REVISION_MERGE_WINDOW
+    (seconds).
+    """
+
+    def __init__(self, snapshot_interval: Optional[int] = None, retention: Optional[int] = None,
+                 merge_window: Optional[float] = None):
+        self.snapshot_interval = max(1, snapshot_interval if snapshot_interval is not None
+                                     else int(os.getenv('NOTES_REVISION_SNAPSHOT_INTERVAL', 20)))
+        self.retention = retention if retention is not None else int(os.getenv('NOTES_REVISION_RETENTION', 200))
+        self.merge_window = merge_window if merge_window is not None \
+            else float(os.getenv('NOTES_REVISION_MERGE_WINDOW', 60))
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    # Binary search over slice comparisons, which run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def encode_snapshot(content: str) -> bytes:
+    return zlib.compress(content.encode('utf-8'))
+
+
+def encode_delta(base: str, content: str) -> bytes:
+    """Encode ``content`` relative to ``base``."""
+    prefix = _common_prefix_length(base, content)
+    suffix = _common_suffix_length(base, content, min(len(base), len(content)) - prefix)
+    middle = content[prefix:len(content) - suffix]
+    return zlib.compress(_DELTA_HEADER.pack(prefix, suffix) + middle.encode('utf-8'))
+
+
+def decode(data: bytes, base: Optional[str] = None) -> str:
+    """Rebuild content from a snapshot payload, or from a delta payload and its base."""
+    raw = zlib.decompress(data)
+    if base is None:
+        return raw.decode('utf-8')
+    prefix, suffix = _DELTA_HEADER.unpack_from(raw)
+    middle = raw[_DELTA_HEADER.size:].decode('utf-8')
+    return base[:prefix] + middle + base[len(base) - suffix:]
+
+
+def due(session: Session, current: Dict[int, str], policy: RevisionPolicy, force: bool = False) -> List[int]:
+    """Return the notes in ``current`` whose edit may need a new revision.
+
+    Notes whose latest revision is still inside the merge window are left
+    out unless the edit is a big deletion. Only the latest revision's
+    timestamp and the stored content's length are read, so this is cheap
+    enough to run on every autosave before loading any content.
+    """
+    if policy.retention <= 0 or not current:
+        return []
+    if force:
+        return list(current)
+
+    notes, revisions = Note.__table__, NoteRevision.__table__
+    latest = select(revisions.c.created_at).where(revisions.c.note_id == notes.c.id) \
+        .order_by(revisions.c.number.desc()).limit(1).scalar_subquery()
+    cutoff = datetime.utcnow() - timedelta(seconds=policy.merge_window)
+    rows = session.execute(
+        select(notes.c.id, func.length(notes.c.content), latest).where(notes.c.id.in_(current))
+    )
+    return [note_id for note_id, length, created_at in rows
+            if created_at is None or created_at <= cutoff
+            or len(current[note_id] or "") < (length or 0) // 2]
+
+
+def record(session: Session, previous: Dict[int, str], current: Dict[int, str],
+           policy: RevisionPolicy, force: bool = False):
+    """Add revisions holding the previous content of notes whose content changes.
+
+    Runs inside the caller's transaction, before it commits: one query for the
+    latest revisions, one for the snapshots deltas are based on, one insert.
+    With ``force`` the merge window is ignored.
+    """
+    if policy.retention <= 0:
+        return
+    changed = {note_id: (previous[note_id] or "", content or "") for note_id, content in current.items()
+               if note_id in previous and (previous[note_id] or "") != (content or "")}
+    if not changed:
+        return
+
+    revisions = NoteRevision.__table__
+    latest_numbers = select(revisions.c.note_id, func.max(revisions.c.number)).where(
+        revisions.c.note_id.in_(changed)
+    ).group_by(revisions.c.note_id)
+    latest = {row.note_id: row for row in session.execute(
+        select(revisions.c.note_id, revisions.c.number, revisions.c.base_number, revisions.c.created_at)
+        .where(tuple_(revisions.c.note_id, revisions.c.number).in_(latest_numbers))
+    )}
+
+    now = datetime.utcnow()
+    pending = []
+    for note_id, (old, new) in changed.items():
+        last = latest.get(note_id)
+        big_deletion = len(new) < len(old) // 2
+        if last is not None and not force and not big_deletion and \
+                (now - last.created_at).total_seconds() < policy.merge_window:
+            continue  # Still part of the edit burst the last revision started
+        number = last.number + 1 if last is not None else 1
+        snapshot = last is None or number - last.base_number >= policy.snapshot_interval
+        pending.append((note_id, old, number, number if snapshot else last.base_number))
+    if not pending:
+        return
+
+    bases = {}
+    wanted = [(note_id, base) for note_id, _, number, base in pending if base != number]
+    if wanted:
+        for note_id, data in session.execute(
+            select(revisions.c.note_id, revisions.c.data)
+            .where(tuple_(revisions.c.note_id, revisions.c.number).in_(wanted))
+        ):
+            bases[note_id] = decode(data)
+
+    rows = []
+    for note_id, old, number, base_number in pending:
+        base = bases.get(note_id) if base_number != number else None
+        data = encode_delta(base, old) if base is not None else encode_snapshot(old)
+        if base is None:
+            base_number = number  # Snapshot, also when the base went missing
+        rows.append({'note_id': note_id, 'number': number, 'base_number': base_number,
+                     'created_at': now, 'length': len(old), 'data': data})
+    session.execute(insert(revisions), rows)
+    _prune(session, rows, policy)
+
+
+def _prune(session: Session, rows, policy: RevisionPolicy):
+    # Checked once per snapshot interval. Keeps at least ``retention`` revisions and
+    # never drops the snapshot the oldest kept delta depends on.
+    due = [{'note_id': row['note_id'], 'keep_from': row['number'] - policy.retention + 1}
+           for row in rows
+           if row['number'] % policy.snapshot_interval == 0 and row['number'] > policy.retention]
+    if not due:
+        return
+    session.execute(text(
+        "DELETE FROM note_revisions WHERE note_id = :note_id AND number < ("
+        "SELECT base_number FROM note_revisions WHERE note_id = :note_id AND number = :keep_from)"
+    ), due)
+
+
+def load(session: Session, note_id: int, number: int) -> Optional[str]:
+    """Return the content stored in a revision, or None if it doesn't exist."""
+    revisions = NoteRevision.__table__
+    row = session.execute(
+        select(revisions.c.base_number, revisions.c.data)
+        .where(revisions.c.note_id == note_id, revisions.c.number == number)
+    ).first()
+    if row is None:
+        return None
+    if row.base_number == number:
+        return decode(row.data)
+    base = session.execute(
+        select(revisions.c.data)
+        .where(revisions.c.note_id == note_id, revisions.c.number == row.base_number)
+    ).scalar()
+    return decode(row.data, decode(base))
@@ -0,0 +1,84 @@
+"""SQLite FTS5 full-text index over the notes table.
+
+The index is an external-content FTS5 table kept in sync with ``notes`` by
+triggers, so every writer (ORM, bulk updates, the autosave worker) keeps it
+current without going through Python.
+"""
+import re
+from typing import List
+
+from trigger_index import TriggerIndex
+
+FTS_TABLE = 'notes_fts'
+
+_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content,
+        content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+# A double-quoted phrase or a run of non-space characters
+_TERM_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+_INDEX = TriggerIndex(
+    FTS_TABLE, _CREATE_STATEMENTS, insert_trigger=_CREATE_STATEMENTS[1],
+    insert_into=f"{FTS_TABLE}(rowid, title, content)",
+    rows="SELECT id, title, content FROM notes",
+    clear=f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    feature="FTS5", fallback="note search will use LIKE", description="full-text",
+)
+
+install = _INDEX.install
+is_installed = _INDEX.is_installed
+rebuild = _INDEX.rebuild
+index_notes = _INDEX.index_notes
+bulk_insert = _INDEX.bulk_insert
+
+
+def split_terms(query: str) -> List[str]:
+    """Split a search string into terms, keeping "quoted phrases" together."""
+    terms = []
+    for phrase, word in _TERM_PATTERN.findall(query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append(term)
+    return terms
+
+
+def build_match_query(query: str) -> str:
+    """Translate user input into an FTS5 MATCH expression.
+
+    Bare words become prefix terms, quoted text becomes a phrase, and all terms
+    must match. Returns an empty string if nothing searchable remains.
+    """
+    parts = []
+    for phrase, word in _TERM_PATTERN.findall(query):
+        if phrase.strip():
+            parts.append('"{}"'.format(phrase.strip().replace('"', '""')))
+        elif any(ch.isalnum() for ch in word):
+            parts.append('"{}"*'.format(word.replace('"', '""')))
+    return ' '.join(parts)
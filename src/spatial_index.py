@@ -0,0 +1,66 @@
+"""SQLite R*Tree index over note geometry.
+
+Each positioned note is stored as its bounding box ``(min_x, max_x, min_y,
+max_y)``. Triggers on ``notes`` keep the index in sync, so geometry written
+through the ORM, bulk updates or the autosave worker is always reflected.
+"""
+from trigger_index import TriggerIndex
+
+RTREE_TABLE = 'notes_rtree'
+
+# Notes without a stored size fall back to the model defaults
+_BOX = """
+    new.id,
+    new.position_x, new.position_x + COALESCE(new.width, 300),
+    new.position_y, new.position_y + COALESCE(new.height, 200)
+"""
+
+_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(
+        id, min_x, max_x, min_y, max_y
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ai AFTER INSERT ON notes
+    WHEN new.position_x IS NOT NULL AND new.position_y IS NOT NULL BEGIN
+        INSERT INTO {RTREE_TABLE} VALUES ({_BOX});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ad AFTER DELETE ON notes BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_au
+    AFTER UPDATE OF position_x, position_y, width, height ON notes BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+        INSERT INTO {RTREE_TABLE} SELECT {_BOX}
+        WHERE new.position_x IS NOT NULL AND new.position_y IS NOT NULL;
+    END
+    """,
+]
+
+_INDEX = TriggerIndex(
+    RTREE_TABLE, _CREATE_STATEMENTS, insert_trigger=_CREATE_STATEMENTS[1],
+    insert_into=RTREE_TABLE,
+    rows=f"SELECT {_BOX.replace('new.', '')} FROM notes "
+         "WHERE position_x IS NOT NULL AND position_y IS NOT NULL",
+    clear=f"DELETE FROM {RTREE_TABLE}",
+    feature="R*Tree", fallback="spatial queries will scan notes", description="spatial",
+)
+
+install = _INDEX.install
+is_installed = _INDEX.is_installed
+rebuild = _INDEX.rebuild
+index_notes = _INDEX.index_notes
+bulk_insert = _INDEX.bulk_insert
+
+
+def distance_to_box(x: float, y: float, min_x: float, max_x: float,
+                    min_y: float, max_y: float) -> float:
+    """Euclidean distance from a point to a box, 0 if the point is inside."""
+    dx = max(min_x - x, 0.0, x - max_x)
+    dy = max(min_y - y, 0.0, y - max_y)
+    return (dx * dx + dy * dy) ** 0.5
@@ -0,0 +1,139 @@
+"""Application-level note styling driven by dynamic properties.
+
+Instead of every note compiling its own stylesheet, one stylesheet is
+installed on the application and notes pick their look through the
+``noteColor`` property on their container and the ``textSize`` property on
+their text edit. Changing either only re-polishes the one widget involved.
+"""
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+
+NOTE_COLORS = {
+    "Dark Gray": "#2d2d2d",
+    "Blue": "#1e3242",
+    "Green": "#1e3c2d",
+    "Purple": "#2d1e42",
+    "Red": "#421e1e",
+    "Orange": "#422d1e"
+}
+DEFAULT_NOTE_COLOR = "#2d2d2d"
+_PALETTE = {color.lower() for color in NOTE_COLORS.values()}
+TEXT_SIZES = range(8, 33)  # Sizes reachable through the text size actions
+
+COLOR_PROPERTY = 'noteColor'
+TEXT_SIZE_PROPERTY = 'textSize'
+
+_BASE_STYLESHEET = """
+NoteWidget #noteContainer {
+    border-radius: 5px;
+    border: 1px solid #333333;
+}
+NoteWidget #noteContainer > QWidget, NoteWidget QLabel {
+    background: transparent;
+    border: none;
+}
+NoteWidget QTextEdit {
+    border: none;
+    background: transparent;
+    color: #ffffff;
+    selection-background-color: #264f78;
+}
+NoteWidget QTextEdit::placeholder {
+    color: #888888;
+}
+NoteWidget QPushButton {
+    border: none;
+    background: transparent;
+    color: #ffffff;
+    font-size: 18px;
+    padding: 5px;
+}
+NoteWidget QPushButton:hover {
+    background-color: rgba(255, 255, 255, 0.1);
+    border-radius: 15px;
+}
+NoteWidget QLabel {
+    color: #888888;
+    font-size: 12px;
+}
+NoteWidget QMenu {
+    background-color: #2d2d2d;
+    border: 1px solid #333333;
+    color: #ffffff;
+}
+NoteWidget QMenu::item {
+    padding: 5px 20px;
+}
+NoteWidget QMenu::item:selected {
+    background-color: #264f78;
+}
+"""
+
+
+def color_role(color: str) -> str:
+    """Return the noteColor property value for a palette color, or '' if it isn't one."""
+    color = (color or "").lower()
+    if color in _PALETTE:
+        return color.lstrip('#')
+    return ""
+
+
+def build_stylesheet() -> str:
+    rules = [_BASE_STYLESHEET]
+    for color in _PALETTE:
+        rules.append(
+            f'NoteWidget #noteContainer[{COLOR_PROPERTY}="{color.lstrip("#")}"] '
+            f'{{ background-color: {color}; }}'
+        )
+    for size in TEXT_SIZES:
+        rules.append(f'NoteWidget QTextEdit[{TEXT_SIZE_PROPERTY}="{size}"] {{ font-size: {size}px; }}')
+    return "\n".join(rules)
+
+
+def install(app):
+    """Append the note stylesheet to the application's stylesheet (once)."""
+    if app.property('noteThemeInstalled'):
+        return
+    app.setStyleSheet(app.styleSheet() + build_stylesheet())
+    app.setProperty('noteThemeInstalled', True)
+
+
+def apply_note_color(container, color: str):
+    """Point a note container at its color rule.
+
+    Colors outside the palette fall back to a one-rule stylesheet on the
+    container itself.
+    """
+    role = color_role(color)
+    if role:
+        if container.styleSheet():
+            container.setStyleSheet("")
+    else:
+        if not QColor.isValidColorName(color):
+            color = DEFAULT_NOTE_COLOR
+        container.setStyleSheet(f"#noteContainer {{ background-color: {color}; }}")
+    _set_property(container, COLOR_PROPERTY, role)
+
+
+def apply_text_size(text_edit, size: int):
+    """Select the text size rule for a note's text edit."""
+    if size in TEXT_SIZES:
+        if text_edit.styleSheet():
+            text_edit.setStyleSheet("")
+        _set_property(text_edit, TEXT_SIZE_PROPERTY, str(size))
+    else:
+        _set_property(text_edit, TEXT_SIZE_PROPERTY, "")
+        text_edit.setStyleSheet(f"font-size: {int(size)}px;")
+
+
+def _set_property(widget, name: str, value: str):
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    if not widget.testAttribute(Qt.WidgetAttribute.WA_WState_Polished):
+        return  # The first polish will pick the property up
+    # Property selectors are only re-evaluated on polish
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+
@@ -0,0 +1,102 @@
+"""SQLite virtual tables over ``notes`` kept in sync by triggers.
+
+The full-text and spatial indexes only differ in their SQL: the statements
+creating the table and its triggers, and a SELECT over ``notes`` giving the
+rows to index. Installing, rebuilding and suspending the insert trigger
+during bulk inserts are shared here.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Iterable, List
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class TriggerIndex:
+    """A virtual table indexing ``notes``, written to by triggers on ``notes``.
+
+    ``create_statements`` create the table first and then its triggers, with
+    ``insert_trigger`` (named ``<table>_ai``) among them. ``rows`` selects
+    what the insert trigger would add for every note, with the note id as its
+    first column named ``id``, and ``insert_into`` is the INSERT target those
+    rows go to. ``clear`` empties the table. ``feature`` and ``fallback`` name
+    the SQLite module and what happens without it, ``description`` the kind
+    of index.
+    """
+
+    def __init__(self, table: str, create_statements: List[str], insert_trigger: str,
+                 insert_into: str, rows: str, clear: str,
+                 feature: str, fallback: str, description: str):
+        self.table = table
+        self.create_statements = create_statements
+        self.insert_trigger = insert_trigger
+        self.clear = clear
+        self.feature = feature
+        self.fallback = fallback
+        self.description = description
+        self._insert_all = f"INSERT INTO {insert_into} {rows}"
+        self._insert_ids = text(
+            f"INSERT INTO {insert_into} SELECT * FROM ({rows}) WHERE id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True))
+
+    def install(self, connection) -> bool:
+        """Create the table and its triggers, backfilling the table once.
+
+        Returns False when the SQLite build lacks the module.
+        """
+        if connection.dialect.name != 'sqlite':
+            return False
+
+        exists = self.is_installed(connection)
+        try:
+            for statement in self.create_statements:
+                connection.execute(text(statement))
+        except OperationalError:
+            logger.warning("SQLite %s is unavailable, %s", self.feature, self.fallback)
+            return False
+
+        if not exists:
+            # Notes written before the index existed
+            self.rebuild(connection)
+            logger.info("Built %s index for existing notes", self.description)
+        return True
+
+    def is_installed(self, connection) -> bool:
+        """Return True if the table exists in the connected database."""
+        row = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.table}
+        ).first()
+        return row is not None
+
+    def rebuild(self, connection):
+        """Re-index every note from the notes table."""
+        connection.execute(text(self.clear))
+        connection.execute(text(self._insert_all))
+
+    def index_notes(self, connection, note_ids: Iterable[int]):
+        """Index notes inserted while the insert trigger was suspended."""
+        note_ids = list(note_ids)
+        if note_ids:
+            connection.execute(self._insert_ids, {'ids': note_ids})
+
+    @contextmanager
+    def bulk_insert(self, connection):
+        """Suspend the insert trigger, indexing inserted notes a batch at a time.
+
+        Yields a function to call with the ids of each batch of inserted
+        notes. One statement per batch is cheaper than the trigger per row,
+        and unlike a rebuild it doesn't touch the notes already indexed. The
+        trigger is restored even if the block fails.
+        """
+        if not self.is_installed(connection):
+            yield lambda note_ids: None
+            return
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {self.table}_ai"))
+        try:
+            yield lambda note_ids: self.index_notes(connection, note_ids)
+        finally:
+            connection.execute(text(self.insert_trigger))
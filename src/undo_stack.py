@@ -0,0 +1,279 @@
+"""Undo and redo for board operations.
+
+A command records what an operation changed and applies it, in either
+direction, through a target (the main window) that updates the board and
+writes the database in one batch. Geometry for many notes is kept in flat
+arrays rather than dicts, so undoing "Arrange Notes" on a large board costs a
+few dozen bytes per moved note. Commands that continue the previous one (a
+note dragged again, text size stepped again) within ``MERGE_WINDOW`` seconds
+are merged into it.
+
+The stack drops its oldest commands once they hold more than ``max_bytes``,
+which defaults to ``NOTES_UNDO_MEMORY_MB`` (16) megabytes.
+"""
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Geometry = Tuple[float, float, float, float]  # (x, y, width, height)
+MERGE_WINDOW = 2.0  # Seconds
+_COMMAND_OVERHEAD = 200  # Rough bytes per command object, on top of its payload
+
+
+class Command(ABC):
+    """One undoable operation that has already been performed.
+
+    ``undo`` and ``redo`` may return ``{old_id: new_id}`` when notes had to be
+    recreated under new ids; the stack then updates every other command.
+    """
+    text = ""
+
+    def __init__(self):
+        self.updated = time.monotonic()
+
+    @abstractmethod
+    def undo(self, target) -> Optional[Dict[int, int]]:
+        """Revert the operation."""
+
+    @abstractmethod
+    def redo(self, target) -> Optional[Dict[int, int]]:
+        """Perform the operation again after it was undone."""
+
+    def merge(self, other: 'Command') -> bool:
+        """Absorb ``other``, performed right after this command; False if it can't."""
+        return False
+
+    def remap(self, note_ids: Dict[int, int]):
+        pass
+
+    def is_empty(self) -> bool:
+        return False
+
+    def size(self) -> int:
+        return _COMMAND_OVERHEAD
+
+
+class GeometryCommand(Command):
+    """Notes moved or resized, e.g. by a drag, "Snap to Grid" or "Arrange Notes".
+
+    Only notes whose geometry actually changed are kept. ``mergeable`` commands
+    for the same notes merge within the merge window.
+    """
+
+    def __init__(self, text: str, before: Dict[int, Geometry], after: Dict[int, Geometry],
+                 mergeable: bool = False):
+        super().__init__()
+        self.text = text
+        self.mergeable = mergeable
+        changed = [note_id for note_id, geometry in after.items()
+                   if note_id in before and tuple(before[note_id]) != tuple(geometry)]
+        self.note_ids = array('q', changed)
+        self.before = array('d', (value for note_id in changed for value in before[note_id]))
+        self.after = array('d', (value for note_id in changed for value in after[note_id]))
+
+    def _geometries(self, values: array) -> Dict[int, Geometry]:
+        return {note_id: tuple(values[index * 4:index * 4 + 4])
+                for index, note_id in enumerate(self.note_ids)}
+
+    def undo(self, target):
+        target.apply_geometries(self._geometries(self.before))
+
+    def redo(self, target):
+        target.apply_geometries(self._geometries(self.after))
+
+    def merge(self, other):
+        if not (isinstance(other, GeometryCommand) and self.mergeable and other.mergeable
+                and other.text == self.text and other.note_ids == self.note_ids
+                and other.updated - self.updated <= MERGE_WINDOW):
+            return False
+        self.after = other.after
+        self.updated = other.updated
+        return True
+
+    def remap(self, note_ids):
+        self.note_ids = array('q', (note_ids.get(note_id, note_id) for note_id in self.note_ids))
+
+    def is_empty(self):
+        return not self.note_ids
+
+    def size(self):
+        arrays = (self.note_ids, self.before, self.after)
+        return _COMMAND_OVERHEAD + sum(len(values) * values.itemsize for values in arrays)
+
+
+class FieldsCommand(Command):
+    """Note fields such as ``color`` or ``text_size`` changed.
+
+    ``before`` and ``after`` map note ids to ``{field: value}``.
+    """
+
+    def __init__(self, text: str, before: Dict[int, dict], after: Dict[int, dict]):
+        super().__init__()
+        self.text = text
+        self.before = before
+        self.after = after
+
+    def undo(self, target):
+        target.apply_fields(self.before)
+
+    def redo(self, target):
+        target.apply_fields(self.after)
+
+    def merge(self, other):
+        if not (isinstance(other, FieldsCommand) and other.text == self.text
+                and {note_id: fields.keys() for note_id, fields in other.after.items()}
+                == {note_id: fields.keys() for note_id, fields in self.after.items()}
+                and other.updated - self.updated <= MERGE_WINDOW):
+            return False
+        self.after = other.after
+        self.updated = other.updated
+        return True
+
+    def remap(self, note_ids):
+        self.before = {note_ids.get(note_id, note_id): fields for note_id, fields in self.before.items()}
+        self.after = {note_ids.get(note_id, note_id): fields for note_id, fields in self.after.items()}
+
+    def is_empty(self):
+        return self.before == self.after
+
+    def size(self):
+        return _COMMAND_OVERHEAD + 100 * len(self.after)
+
+
+class DeleteNotesCommand(Command):
+    """Notes deleted; keeps the snapshots from NoteOperations.snapshot_notes."""
+
+    def __init__(self, snapshots: list, text: str = "Delete Note"):
+        super().__init__()
+        self.text = text
+        self.snapshots = snapshots
+
+    def undo(self, target):
+        return target.restore_notes(self.snapshots)
+
+    def redo(self, target):
+        # Edits made since the undo must come back with the next undo too
+        note_ids = [snapshot['note']['id'] for snapshot in self.snapshots]
+        self.snapshots = target.snapshot_notes(note_ids)
+        target.remove_notes(note_ids)
+
+    def remap(self, note_ids):
+        for snapshot in self.snapshots:
+            note = snapshot['note']
+            note['id'] = note_ids.get(note['id'], note['id'])
+            for revision in snapshot['revisions']:
+                revision['note_id'] = note['id']
+
+    def is_empty(self):
+        return not self.snapshots
+
+    def size(self):
+        total = _COMMAND_OVERHEAD
+        for snapshot in self.snapshots:
+            rows = [snapshot['note']] + snapshot['revisions']
+            total += 100 * len(rows) + 8 * len(snapshot['tags'])
+            total += sum(len(value) for row in rows for value in row.values()
+                         if isinstance(value, (str, bytes)))
+        return total
+
+
+class UndoStack:
+    """Undo and redo history with a memory cap.
+
+    ``push`` takes commands that have already been performed; ``undo`` and
+    ``redo`` apply them to ``target``.
+    """
+
+    def __init__(self, target, max_bytes: Optional[int] = None):
+        self.target = target
+        self.max_bytes = max_bytes if max_bytes is not None \
+            else int(float(os.getenv('NOTES_UNDO_MEMORY_MB', 16)) * 1024 * 1024)
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+
+    @property
+    def memory(self) -> int:
+        """Estimated bytes held by the history."""
+        return self._bytes
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_text(self) -> str:
+        return self._undo[-1].text if self._undo else ""
+
+    def redo_text(self) -> str:
+        return self._redo[-1].text if self._redo else ""
+
+    def push(self, command: Command):
+        if command.is_empty():
+            return
+        self._bytes -= sum(redo.size() for redo in self._redo)
+        self._redo.clear()
+
+        top = self._undo[-1] if self._undo else None
+        top_size = top.size() if top is not None else 0
+        if top is not None and top.merge(command):
+            self._bytes += top.size() - top_size
+        else:
+            self._undo.append(command)
+            self._bytes += command.size()
+
+        while self._undo and self._bytes > self.max_bytes:
+            dropped = self._undo.popleft()
+            self._bytes -= dropped.size()
+            logger.debug("Undo history full, dropped %r", dropped.text)
+
+    def undo(self) -> bool:
+        """Undo the latest command; returns False if there is none."""
+        if not self._undo:
+            return False
+        command = self._undo.pop()
+        size = command.size()
+        try:
+            remapped = command.undo(self.target)
+        except Exception:
+            self._undo.append(command)
+            raise
+        self._bytes += command.size() - size
+        self._redo.append(command)
+        if remapped:
+            self.remap(remapped)
+        return True
+
+    def redo(self) -> bool:
+        """Redo the latest undone command; returns False if there is none."""
+        if not self._redo:
+            return False
+        command = self._redo.pop()
+        size = command.size()  # Commands may capture fresh state when applied
+        try:
+            remapped = command.redo(self.target)
+        except Exception:
+            self._redo.append(command)
+            raise
+        self._bytes += command.size() - size
+        self._undo.append(command)
+        if remapped:
+            self.remap(remapped)
+        return True
+
+    def remap(self, note_ids: Dict[int, int]):
+        """Point every command at the new ids of notes that were recreated."""
+        for command in list(self._undo) + self._redo:
+            command.remap(note_ids)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
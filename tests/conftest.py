@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# The application modules live in src/ and import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import database
+from note_operations import NoteOperations
+
+
+@pytest.fixture(scope='session')
+def app():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    # A developer's .env or NOTES_* variables would change the engine profile
+    # and revision settings, so tests always run with the built-in defaults
+    monkeypatch.setattr(database, 'load_dotenv', lambda: None)
+    for name in list(os.environ):
+        if name.startswith('NOTES_'):
+            monkeypatch.delenv(name)
+
+
+@pytest.fixture
+def db(tmp_path, clean_env):
+    db = database.Database(str(tmp_path / 'notes.db'), profile=database.DEFAULT_PROFILE)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def note_ops(db):
+    return NoteOperations(db.get_session())
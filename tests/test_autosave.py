@@ -0,0 +1,64 @@
+from autosave import AutosaveQueue
+from note_operations import NoteOperations
+
+
+def test_close_keeps_edits_when_final_flush_fails(db, note_ops, monkeypatch):
+    note = note_ops.create_note("", "old")
+    apply_updates = NoteOperations.apply_updates
+
+    def locked(self, updates, force_revision=False):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(NoteOperations, 'apply_updates', locked)
+    queue = AutosaveQueue(db.create_session, window_ms=10)
+    queue.enqueue(note.id, content="new")
+    assert not queue.close(attempts=2)
+    assert queue.pending(note.id) == {'content': "new"}
+
+    monkeypatch.setattr(NoteOperations, 'apply_updates', apply_updates)
+    assert queue.close()
+    assert NoteOperations(db.create_session()).get_note_contents([note.id]) == {note.id: "new"}
+
+
+def test_cancelled_close_leaves_window_untouched(app, db, note_ops, tmp_path, monkeypatch):
+    from PyQt6.QtGui import QCloseEvent
+    import main
+
+    for i in range(3):
+        note_ops.create_note("", f"note {i}", position_x=i * 400, position_y=0)
+    monkeypatch.setenv('NOTES_DB_PATH', str(tmp_path / 'notes.db'))
+    window = main.MainWindow()
+    window.start()  # Opens the database and queues the notes without loading them yet
+    queued = list(window._load_queue)
+    assert queued
+
+    saved = []
+    monkeypatch.setattr(window.note_ops, 'save_viewport_state', saved.append)
+    monkeypatch.setattr(window.autosave, 'close', lambda: False)
+    monkeypatch.setattr(main.QMessageBox, 'warning',
+                        lambda *args: main.QMessageBox.StandardButton.Cancel)
+    event = QCloseEvent()
+    window.closeEvent(event)
+    assert not event.isAccepted()
+    assert window._load_queue == queued
+    assert saved == []
+
+    # Once the edits are saved the window closes as usual
+    del window.autosave.close
+    event = QCloseEvent()
+    window.closeEvent(event)
+    assert event.isAccepted()
+    assert window._load_queue == []
+    assert len(saved) == 1
+
+
+def test_has_pending_filters_by_field(db):
+    queue = AutosaveQueue(db.create_session, window_ms=60000)
+    assert not queue.has_pending()
+    queue.enqueue(1, position_x=10.0)
+    assert queue.has_pending()
+    assert not queue.has_pending({'title', 'content'})
+    queue.enqueue(1, content="typed")
+    assert queue.has_pending({'title', 'content'})
+    queue.discard(1)
+    queue.stop()
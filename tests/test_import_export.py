@@ -0,0 +1,22 @@
+import json
+
+from sqlalchemy import text
+
+from import_export import import_jsonl
+
+
+def test_import_indexes_new_notes_alongside_existing_ones(db, note_ops, tmp_path):
+    existing = note_ops.create_note("", "existing walrus", position_x=0, position_y=0)
+    path = tmp_path / 'notes.jsonl'
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(5):
+            # Id 1 is taken, so the first note gets a new one
+            file.write(json.dumps({'id': i + 1, 'content': f"imported narwhal {i}",
+                                   'position_x': 1000 + i * 400, 'position_y': 0}) + "\n")
+
+    assert import_jsonl(db.engine, str(path), chunk_size=2) == 5
+    assert len(note_ops.search_notes("narwhal")) == 5
+    assert [note.id for note in note_ops.search_notes("walrus")] == [existing.id]
+    assert len(note_ops.get_notes_in_rect(0, 0, 3000, 300)) == 6
+    with db.engine.begin() as connection:
+        connection.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('integrity-check')"))
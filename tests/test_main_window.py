@@ -0,0 +1,44 @@
+import main
+
+
+def test_first_paint_reported_once(app, clean_env):
+    window = main.MainWindow()
+    painted, started = [], []
+
+    def start():  # Like MainWindow.start without opening the database
+        if not window._started:
+            window._started = True
+            started.append(True)
+
+    window.first_painted.connect(lambda: painted.append(True))
+    window.start = start
+    window.show()
+    app.processEvents()  # First paint, which queues start()
+    window.repaint()  # Painted again before start() ran
+    app.processEvents()
+    app.processEvents()
+    assert painted == [True]
+    assert started == [True]
+    window.close()
+
+
+def test_search_flushes_only_queued_text_edits(app, db, note_ops, tmp_path, monkeypatch):
+    note = note_ops.create_note("", "walrus", position_x=0, position_y=0)
+    monkeypatch.setenv('NOTES_DB_PATH', str(tmp_path / 'notes.db'))
+    window = main.MainWindow()
+    window.start()
+    flushes = []
+    flush = window.autosave.flush
+    window.autosave.flush = lambda: flushes.append(True) or flush()
+
+    window.search_bar.setText("walrus")
+    window.autosave.enqueue(note.id, position_x=50.0)
+    window.perform_search()
+    assert flushes == []
+
+    window.autosave.enqueue(note.id, content="narwhal")
+    window.perform_search()
+    assert flushes == [True]
+
+    del window.autosave.flush
+    window.close()
@@ -0,0 +1,27 @@
+def test_edits_inside_merge_window_skip_loading_content(note_ops, monkeypatch):
+    note = note_ops.create_note("", "first draft")
+    note_ops.apply_updates({note.id: {'content': "second draft"}})
+    assert len(note_ops.list_revisions(note.id)) == 1
+
+    loaded = []
+    get_note_contents = note_ops.get_note_contents
+    monkeypatch.setattr(note_ops, 'get_note_contents',
+                        lambda note_ids: loaded.append(list(note_ids)) or get_note_contents(note_ids))
+    note_ops.apply_updates({note.id: {'content': "third draft"}})
+    assert loaded == []
+    assert len(note_ops.list_revisions(note.id)) == 1
+
+
+def test_big_deletion_inside_merge_window_is_recorded(note_ops):
+    note = note_ops.create_note("", "first draft")
+    note_ops.apply_updates({note.id: {'content': "a much longer second draft"}})
+    note_ops.apply_updates({note.id: {'content': "a"}})
+    assert [row.number for row in note_ops.list_revisions(note.id)] == [2, 1]
+    assert note_ops.get_revision_content(note.id, 2) == "a much longer second draft"
+
+
+def test_forced_revision_ignores_merge_window(note_ops):
+    note = note_ops.create_note("", "first draft")
+    note_ops.apply_updates({note.id: {'content': "second draft"}})
+    assert note_ops.restore_revision(note.id, 1)
+    assert note_ops.get_revision_content(note.id, 2) == "second draft"
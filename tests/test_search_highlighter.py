@@ -0,0 +1,29 @@
+from PyQt6.QtGui import QTextDocument
+
+from note_widget import SearchHighlighter
+
+
+def highlighted_spans(document):
+    spans = {}
+    block = document.begin()
+    while block.isValid():
+        ranges = [(r.start, r.start + r.length) for r in block.layout().formats()]
+        if ranges:
+            spans[block.blockNumber()] = ranges
+        block = block.next()
+    return spans
+
+
+def test_query_change_after_soft_line_break(app):
+    document = QTextDocument()
+    # U+2028 is what Shift+Enter inserts: a line break inside one block
+    document.setPlainText("alpha\u2028beta\ngamma beta")
+    highlighter = SearchHighlighter(document, "alpha")
+    highlighter.rehighlight()  # The initial pass is otherwise deferred to the event loop
+    assert highlighted_spans(document) == {0: [(0, 5)]}
+
+    highlighter.set_search_text("beta")
+    assert highlighted_spans(document) == {0: [(6, 10)], 1: [(6, 10)]}
+
+    highlighter.set_search_text("gamma")
+    assert highlighted_spans(document) == {1: [(0, 5)]}
@@ -0,0 +1,14 @@
+def test_nearest_note_on_sparse_board(note_ops):
+    # Only note sits diagonally beyond the search radius once the window covers the board
+    note = note_ops.create_note("", "far", position_x=1500, position_y=1500)
+    assert [found.id for found in note_ops.get_nearest_notes(0, 0)] == [note.id]
+
+
+def test_nearest_notes_ranked_by_distance(note_ops):
+    far = note_ops.create_note("", "far", position_x=1500, position_y=1500)
+    near = note_ops.create_note("", "near", position_x=-900, position_y=0)
+    assert [found.id for found in note_ops.get_nearest_notes(0, 0, limit=5)] == [near.id, far.id]
+
+
+def test_nearest_notes_on_empty_board(note_ops):
+    assert note_ops.get_nearest_notes(0, 0) == []
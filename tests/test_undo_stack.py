@@ -0,0 +1,44 @@
+import pytest
+
+from undo_stack import Command, DeleteNotesCommand, UndoStack
+
+
+class NotesTarget:
+    """The part of MainWindow that DeleteNotesCommand works through."""
+
+    def __init__(self, note_ops):
+        self.note_ops = note_ops
+
+    def snapshot_notes(self, note_ids):
+        return self.note_ops.snapshot_notes(note_ids)
+
+    def remove_notes(self, note_ids):
+        return self.note_ops.delete_notes(note_ids)
+
+    def restore_notes(self, snapshots):
+        return self.note_ops.restore_notes(snapshots)
+
+
+def test_commands_must_implement_undo_and_redo():
+    class Incomplete(Command):
+        def undo(self, target):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_redo_delete_keeps_edits_made_after_undo(note_ops):
+    note = note_ops.create_note("", "original")
+    stack = UndoStack(NotesTarget(note_ops))
+    snapshots = note_ops.snapshot_notes([note.id])
+    note_ops.delete_notes([note.id])
+    stack.push(DeleteNotesCommand(snapshots))
+
+    stack.undo()
+    note_ops.apply_updates({note.id: {'content': "edited after undo"}})
+    stack.redo()
+    assert note_ops.get_note_contents([note.id]) == {}
+    stack.undo()
+    assert note_ops.get_note_contents([note.id]) == {note.id: "edited after undo"}
+    assert stack.memory == stack._redo[-1].size()  # Accounts for the fresh snapshot